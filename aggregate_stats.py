@@ -0,0 +1,275 @@
+# aggregate_stats.py
+"""Fold new innings into running per-batter totals and regenerate the batter stats CSVs.
+
+Input files are read in fixed-size chunks, so memory does not grow with their
+length. Two layouts are accepted:
+
+* per-innings: batter, bowling_team (or opponent_team), venue, runs, balls
+* ball-by-ball: match_id, inning, batter, bowling_team, venue, batsman_runs
+  (plus extras_type, whose wides are not counted as balls faced); recognised by
+  its match_id and inning columns and the absence of a balls column
+
+Running sums and innings counts per batter, per batter/opponent and per
+batter/venue are kept in a state file, and files already ingested (by content
+hash) are skipped, so each run costs time in proportion to the new data. Only
+the rows of batters that appear in it are recomputed; every other row of both
+CSVs is copied through unchanged. Both CSVs, the state and the binary CSV
+caches are replaced atomically, the state last, so a failed run ingests nothing.
+
+    python aggregate_stats.py innings_2025_*.csv
+"""
+import argparse
+import csv
+import io
+import json
+import os
+import sys
+import time
+from feature_store import CACHE_DIR, file_sha256, load_csv_stats, write_atomic
+
+ROOT = os.path.dirname(os.path.abspath(__file__))
+UNIFIED_CSV = os.path.join(ROOT, "unified_batter_stats.csv")
+ENGINEERED_CSV = os.path.join(ROOT, "engineered_batter_stats.csv")
+STATE_PATH = os.path.join(CACHE_DIR, "batter_aggregates.json")
+
+STATE_VERSION = 1
+
+# Accepted spellings of each input column
+COLUMN_ALIASES = {
+    "batter": ["batter", "batsman", "striker", "batter_name"],
+    "opponent": ["bowling_team", "opponent_team", "opponent"],
+    "venue": ["venue", "venue_name"],
+    "runs": ["runs", "batsman_runs", "batter_runs"],
+    "balls": ["balls", "balls_faced"]
+}
+
+SUMMARY_COLUMNS = ["avg_total_runs", "avg_strike_rate", "avg_runs_vs_team", "avg_runs_at_stadium"]
+
+
+def empty_state():
+    return {"version": STATE_VERSION, "files": {}, "batters": {}, "opponents": {}, "venues": {}}
+
+
+def load_state(path):
+    if not os.path.exists(path):
+        return empty_state()
+    with open(path) as file:
+        state = json.load(file)
+    if state.get("version") != STATE_VERSION:
+        raise ValueError(f"{path} was written by a different version; rerun with --rebuild")
+    return state
+
+
+def load_pending(path):
+    if not os.path.exists(path):
+        return []
+    with open(path) as file:
+        return json.load(file)
+
+
+def resolve_columns(columns):
+    """Map our column roles to the file's column names"""
+    resolved = {}
+    for role, aliases in COLUMN_ALIASES.items():
+        for alias in aliases:
+            if alias in columns:
+                resolved[role] = alias
+                break
+    return resolved
+
+
+def innings_chunks(path, chunk_size):
+    """Yield DataFrames with one row per innings (batter, opponent, venue, runs, balls, innings)"""
+    import pandas as pd
+
+    header = set(pd.read_csv(path, nrows=0).columns)
+    columns = resolve_columns(header)
+    ball_by_ball = {"match_id", "inning"} <= header and "balls" not in columns
+    required = ["batter", "opponent", "venue", "runs"] + ([] if ball_by_ball else ["balls"])
+    missing = [role for role in required if role not in columns]
+    if missing:
+        raise ValueError(f"{path} has no column for: {', '.join(missing)}")
+
+    keys = ["batter", "opponent", "venue"]
+    # Batters of the innings still in progress at the end of the previous chunk
+    open_innings = set()
+    for chunk in pd.read_csv(path, chunksize=chunk_size):
+        frame = pd.DataFrame({role: chunk[columns[role]] for role in keys})
+        frame["runs"] = pd.to_numeric(chunk[columns["runs"]], errors="coerce").fillna(0)
+        if not ball_by_ball:
+            frame["balls"] = pd.to_numeric(chunk[columns["balls"]], errors="coerce").fillna(0)
+            frame["innings"] = 1
+            yield frame
+            continue
+
+        # Deliveries: wides don't count as balls faced; an innings may straddle two chunks
+        extras = chunk["extras_type"] if "extras_type" in chunk.columns else pd.Series("", index=chunk.index)
+        frame["balls"] = (extras.fillna("").astype(str) != "wides").astype(int)
+        frame["match_id"] = chunk["match_id"].values
+        frame["inning"] = chunk["inning"].values
+        grouped = frame.groupby(["match_id", "inning"] + keys, sort=False, as_index=False)[["runs", "balls"]].sum()
+        innings_keys = list(zip(grouped["match_id"], grouped["inning"], grouped["batter"]))
+        grouped["innings"] = [0 if key in open_innings else 1 for key in innings_keys]
+        # Keep every batter of the last innings, including ones who didn't face a ball in this chunk
+        last_innings = (chunk["match_id"].iloc[-1], chunk["inning"].iloc[-1])
+        open_innings = {key for key in open_innings | set(innings_keys) if key[:2] == last_innings}
+        yield grouped[keys + ["runs", "balls", "innings"]]
+
+
+def add_chunk(state, frame):
+    """Add one chunk's totals to the running sums; returns the batters it touched"""
+    batters = state["batters"]
+    totals_by_batter = frame.groupby("batter", sort=False)[["runs", "balls", "innings"]].sum()
+    for batter, runs, balls, innings in totals_by_batter.itertuples():
+        totals = batters.setdefault(str(batter), [0, 0, 0])
+        totals[0] += float(runs)
+        totals[1] += float(balls)
+        totals[2] += int(innings)
+    for group, table in (("opponent", "opponents"), ("venue", "venues")):
+        sums = frame.groupby(["batter", group], sort=False)[["runs", "innings"]].sum()
+        for (batter, name), runs, innings in sums.itertuples():
+            totals = state[table].setdefault(str(batter), {}).setdefault(str(name), [0, 0])
+            totals[0] += float(runs)
+            totals[1] += int(innings)
+    return set(frame["batter"].astype(str))
+
+
+def batter_row(state, batter, teams):
+    """Summary values and {team: average} for one batter from the running sums"""
+    runs, balls, innings = state["batters"].get(batter, [0, 0, 0])
+    team_averages = {
+        team: runs_vs / innings_vs if innings_vs else 0.0
+        for team, (runs_vs, innings_vs) in state["opponents"].get(batter, {}).items()
+    }
+    venue_averages = [
+        runs_at / innings_at for runs_at, innings_at in state["venues"].get(batter, {}).values() if innings_at
+    ]
+    played = [average for average in team_averages.values() if average > 0]
+    summary = {
+        "avg_total_runs": runs / innings if innings else 0.0,
+        "avg_strike_rate": runs / balls * 100 if balls else 0.0,
+        "avg_runs_vs_team": sum(played) / len(played) if played else 0.0,
+        "avg_runs_at_stadium": sum(venue_averages) / len(venue_averages) if venue_averages else 0.0
+    }
+    return summary, [team_averages.get(team, 0.0) for team in teams]
+
+
+def read_rows(path):
+    """Header and {batter: row} of an existing stats CSV (empty if it doesn't exist)"""
+    if not os.path.exists(path):
+        return None, {}
+    with open(path, newline="") as file:
+        reader = csv.reader(file)
+        header = next(reader)
+        return header, {row[0]: row for row in reader}
+
+
+def team_columns(header, prefix):
+    # Team columns are the ones that aren't summaries, without the layout's prefix
+    return [column[len(prefix):] for column in header[1:] if column not in SUMMARY_COLUMNS]
+
+
+def write_layout(path, layout, state, touched):
+    """Rewrite one CSV layout, recomputing only the touched batters' rows"""
+    header, rows = read_rows(path)
+    prefix = "avg_runs_vs_" if layout == "engineered" else ""
+    teams = team_columns(header, prefix) if header else []
+    new_teams = sorted({team for batter in touched for team in state["opponents"].get(batter, {})} - set(teams))
+    teams += new_teams
+
+    if layout == "engineered":
+        columns = ["avg_total_runs", "avg_strike_rate"] + [prefix + team for team in teams] + \
+            ["avg_runs_at_stadium", "avg_runs_vs_team"]
+    else:
+        columns = SUMMARY_COLUMNS + teams
+    new_header = ["batter"] + columns
+    if header is not None and new_teams:
+        # Existing rows have no data against teams they never faced
+        old_index = {column: i for i, column in enumerate(header)}
+        rows = {
+            batter: [row[old_index[column]] if column in old_index else "0.0" for column in new_header]
+            for batter, row in rows.items()
+        }
+
+    for batter in touched:
+        summary, team_values = batter_row(state, batter, teams)
+        values = dict(summary, **{prefix + team: value for team, value in zip(teams, team_values)})
+        rows[batter] = [batter] + [repr(float(values[column])) for column in columns]
+
+    def write(file):
+        text = io.TextIOWrapper(file, encoding="utf-8", newline="")
+        writer = csv.writer(text, lineterminator="\n")
+        writer.writerow(new_header)
+        writer.writerows(rows[batter] for batter in sorted(rows))
+        text.flush()
+        text.detach()
+
+    write_atomic(path, write)
+    return len(rows)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Ingest new innings and regenerate the batter stats CSVs")
+    parser.add_argument("inputs", nargs="+", help="per-innings or ball-by-ball CSV files")
+    parser.add_argument("--state", default=STATE_PATH, help="running totals file")
+    parser.add_argument("--unified", default=UNIFIED_CSV)
+    parser.add_argument("--engineered", default=ENGINEERED_CSV)
+    parser.add_argument("--chunk-size", type=int, default=100000, help="input rows read at a time")
+    parser.add_argument("--rebuild", action="store_true", help="discard the running totals and start over")
+    parser.add_argument("--replace-untracked", action="store_true",
+                        help="allow overwriting CSV rows of batters that have no running totals yet")
+    args = parser.parse_args(argv)
+
+    started = time.perf_counter()
+    state = empty_state() if args.rebuild else load_state(args.state)
+    # Batters whose rows a run that failed before saving the state already rewrote
+    pending_path = f"{args.state}.pending"
+    pending = set(load_pending(pending_path))
+    known = set(state["batters"]) | pending
+    touched = set()
+    ingested = 0
+    for path in args.inputs:
+        digest = file_sha256(path)
+        if digest in state["files"]:
+            print(f"Skipping {path}: already ingested", file=sys.stderr)
+            continue
+        rows = 0
+        for frame in innings_chunks(path, args.chunk_size):
+            touched |= add_chunk(state, frame)
+            rows += int(frame["innings"].sum())
+        state["files"][digest] = {"path": os.path.basename(path), "innings": rows, "ingested_at": time.time()}
+        ingested += rows
+
+    if not touched:
+        print("No new innings", file=sys.stderr)
+        return 0
+
+    # Rows in the CSVs that predate the running totals have no counts to add to, so
+    # they could only be replaced by the new data alone; refuse unless asked to
+    _, existing = read_rows(args.unified)
+    untracked = sorted(batter for batter in touched if batter in existing and batter not in known)
+    if untracked and not (args.replace_untracked or args.rebuild):
+        print(f"{len(untracked)} batters in the CSVs have no running totals (e.g. {', '.join(untracked[:3])}). "
+              f"Ingest their full history with --rebuild, or pass --replace-untracked to overwrite "
+              f"their rows with the new data only. Nothing was written.", file=sys.stderr)
+        return 1
+
+    os.makedirs(os.path.dirname(os.path.abspath(args.state)), exist_ok=True)
+    pending = sorted(pending | touched)
+    write_atomic(pending_path, lambda file: file.write(json.dumps(pending).encode("utf-8")))
+    for path, layout in ((args.unified, "unified"), (args.engineered, "engineered")):
+        total = write_layout(path, layout, state, touched)
+        # Refresh the binary cache now rather than on the next app start
+        load_csv_stats(path)
+        print(f"{path}: {len(touched)} of {total} batters updated", file=sys.stderr)
+    # Last: until the state is written the inputs aren't marked ingested, so a run that
+    # failed above can simply be repeated (the rows are recomputed from the same totals)
+    write_atomic(args.state, lambda file: file.write(json.dumps(state).encode("utf-8")))
+    os.remove(pending_path)
+
+    print(f"Ingested {ingested} innings in {time.perf_counter() - started:.2f}s", file=sys.stderr)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,619 +1,1164 @@
 # app.py
-from flask import Flask, request, jsonify, send_from_directory
+from flask import Flask, Response, g, request, jsonify, send_from_directory, stream_with_context
 from flask_cors import CORS
 import os
-import pickle
+import hmac
+import hashlib
+import json
+import time
 import numpy as np
-from statistics import mean
-import csv
+import threading
+from feature_store import CACHE_DIR, FEATURE_NAMES, load_csv_stats
+from prediction_cache import PredictionCache
+from model_registry import ModelRegistry
+from team_strengths import TeamStrengths
+from metrics import Metrics
+from batching import MicroBatcher
+from batter_search import BatterIndex, normalize
+from ipl_data import batter_profiles, ipl_teams, ipl_venues, team_registry, venue_registry
+import scoring
+from scoring import (
+    BATTER_STATS_CSV, build_feature_store, format_interval, format_prediction, matchup_type_error, resolve_matchup
+)
+from inference import DEFAULT_QUANTILES, STACKED_MAX_ROWS, predict_with_intervals
+from shared_tables import memory_usage, share_arrays, trim_heap
+from prediction_cube import CubeRefresher
+from admission import AdmissionController, RateLimiter, retry_after_header
+from profiling import RequestProfiler
+from encoding import (
+    ARROW, JSON, MSGPACK, NDJSON, ArrowStreamEncoder, available_formats, compact_result, dumps_json,
+    encode_results, msgpack, result_columns
+)
 
 app = Flask(__name__)
 CORS(app)
 
-# Load batter data from CSV
-def load_batters_from_csv():
-    batters = []
-    csv_path = os.path.join(os.path.dirname(__file__), 'unified_batter_stats.csv')
+# Request and per-stage latency metrics; set METRICS_DIR to aggregate across gunicorn workers
+# (gunicorn.conf.py sets one and empties it when the server starts)
+metrics = Metrics(directory=os.environ.get("METRICS_DIR"))
+metrics.describe("http_requests_total", "counter", "HTTP requests by endpoint and status")
+metrics.describe("http_request_duration_seconds", "histogram", "End-to-end request latency by endpoint")
+metrics.describe("predict_stage_seconds", "histogram", "Time spent in each stage of /predict")
+metrics.describe("prediction_errors_total", "counter", "Rejected matchups by validation failure type")
+metrics.describe("process_resident_memory_bytes", "gauge", "Resident memory of each worker by kind")
+
+@app.before_request
+def start_request_timer():
+    g.request_started = time.perf_counter()
+
+def request_arrival():
+    """perf_counter time the request reached the front proxy (X-Request-Start), else when Flask got it.
+
+    Accepts "t=<time>" or a bare number, in seconds, milliseconds or microseconds
+    since the epoch, as nginx, Heroku and most load balancers send it.
+    """
+    started = g.get("request_started", time.perf_counter())
+    header = request.headers.get("X-Request-Start", "")
+    try:
+        sent = float(header[2:] if header.startswith("t=") else header)
+    except ValueError:
+        return started
+    while sent > 1e11:
+        sent /= 1000.0
+    # A clock ahead of ours would put arrival in the future; count no wait then
+    return started - max(time.time() - (time.perf_counter() - started) - sent, 0.0)
+
+@app.after_request
+def record_request_metrics(response):
+    started = g.pop("request_started", None)
+    if started is not None:
+        labels = {"endpoint": request.endpoint or "unknown"}
+        metrics.observe("http_request_duration_seconds", time.perf_counter() - started, labels)
+        metrics.inc("http_requests_total", dict(labels, status=str(response.status_code)))
+        metrics.maybe_flush()
+    return response
+
+def load_batter_stats():
+    """Load the roster CSV through the binary cache; None if it can't be read"""
     try:
-        with open(csv_path, 'r') as file:
-            reader = csv.reader(file)
-            next(reader)  # Skip header
-            for row in reader:
-                if row:  # Ensure row is not empty
-                    batters.append(row[0])  # First column contains batter name
+        return load_csv_stats(BATTER_STATS_CSV)
     except Exception as e:
-        print(f"Error loading batters from CSV: {e}")
+        print(f"Error loading batter stats from CSV: {e}")
+        return None
+
+# Load batter data from CSV
+def load_batters_from_csv():
+    stats = load_batter_stats()
+    if stats is not None:
+        batters = list(stats.names)
+    else:
         # Fallback to some default batters if CSV loading fails
         batters = ["Virat Kohli", "MS Dhoni", "Rohit Sharma", "KL Rahul"]
     
     return sorted(batters)  # Return sorted list of batters
 
-# Model loading with error handling
-model = None
-model_filename = "trained_model.pkl"
-
-try:
-    if os.path.exists(model_filename):
-        with open(model_filename, "rb") as file:
-            model = pickle.load(file)
-            print(f"Model loaded successfully from {model_filename}")
-    else:
-        print(f"Warning: Model file {model_filename} not found")
-except Exception as e:
-    print(f"Error loading model: {str(e)}")
-
-# Define IPL teams
-ipl_teams = ["CSK", "MI", "RCB", "KKR", "DC", "SRH", "PBKS", "RR", "GT", "LSG"]
-
-# Define IPL venues with realistic difficulty ratings (based on batting averages)
-ipl_venues = {
-    "MA Chidambaram Stadium": {"venue_difficulty": 27.4},  # Chennai - spin friendly
-    "Wankhede Stadium": {"venue_difficulty": 31.2},        # Mumbai - batting friendly
-    "M Chinnaswamy Stadium": {"venue_difficulty": 33.8},   # Bangalore - highest scoring
-    "Eden Gardens": {"venue_difficulty": 29.5},            # Kolkata - balanced
-    "Arun Jaitley Stadium": {"venue_difficulty": 30.7},    # Delhi - batting friendly
-    "Rajiv Gandhi Stadium": {"venue_difficulty": 28.3},    # Hyderabad - balanced
-    "Punjab Cricket Association Stadium": {"venue_difficulty": 31.5},  # Mohali - batting friendly
-    "Sawai Mansingh Stadium": {"venue_difficulty": 29.1},  # Jaipur - balanced
-    "Narendra Modi Stadium": {"venue_difficulty": 28.4},   # Ahmedabad - large ground
-    "Ekana Cricket Stadium": {"venue_difficulty": 26.8}    # Lucknow - slow pitch
-}
-
-# Define batter profiles with realistic values
-batter_profiles = {
-    "Virat Kohli": {
-        "average_runs": 37.8,
-        "average_strike_rate": 135.7,
-        "total_balls_faced": 1842,
-        "total_dismissals": 47,
-        "team_averages": {
-            "CSK": 36.4, "MI": 39.2, "RCB": 0.0, "KKR": 41.3, "DC": 38.7,
-            "SRH": 35.9, "PBKS": 42.2, "RR": 40.8, "GT": 33.5, "LSG": 35.2
-        },
-        "venue_averages": {
-            "MA Chidambaram Stadium": 33.6, "Wankhede Stadium": 40.2, "M Chinnaswamy Stadium": 48.7,
-            "Eden Gardens": 42.9, "Arun Jaitley Stadium": 43.5, "Rajiv Gandhi Stadium": 35.8,
-            "Punjab Cricket Association Stadium": 41.3, "Sawai Mansingh Stadium": 39.5,
-            "Narendra Modi Stadium": 34.8, "Ekana Cricket Stadium": 32.4
-        }
-    },
-    "Rohit Sharma": {
-        "average_runs": 29.4,
-        "average_strike_rate": 133.8,
-        "total_balls_faced": 1738,
-        "total_dismissals": 58,
-        "team_averages": {
-            "CSK": 33.6, "MI": 0.0, "RCB": 32.8, "KKR": 31.4, "DC": 34.5,
-            "SRH": 27.8, "PBKS": 31.2, "RR": 29.7, "GT": 28.5, "LSG": 30.1
-        },
-        "venue_averages": {
-            "MA Chidambaram Stadium": 26.4, "Wankhede Stadium": 38.7, "M Chinnaswamy Stadium": 34.9,
-            "Eden Gardens": 33.5, "Arun Jaitley Stadium": 32.8, "Rajiv Gandhi Stadium": 25.6,
-            "Punjab Cricket Association Stadium": 30.2, "Sawai Mansingh Stadium": 28.3,
-            "Narendra Modi Stadium": 31.4, "Ekana Cricket Stadium": 25.2
-        }
-    },
-    "MS Dhoni": {
-        "average_runs": 24.8,
-        "average_strike_rate": 153.5,
-        "total_balls_faced": 982,
-        "total_dismissals": 38,
-        "team_averages": {
-            "CSK": 0.0, "MI": 22.7, "RCB": 26.3, "KKR": 25.2, "DC": 23.8,
-            "SRH": 21.9, "PBKS": 27.1, "RR": 24.5, "GT": 20.2, "LSG": 22.4
-        },
-        "venue_averages": {
-            "MA Chidambaram Stadium": 33.6, "Wankhede Stadium": 25.7, "M Chinnaswamy Stadium": 27.2,
-            "Eden Gardens": 30.1, "Arun Jaitley Stadium": 23.8, "Rajiv Gandhi Stadium": 22.4,
-            "Punjab Cricket Association Stadium": 24.9, "Sawai Mansingh Stadium": 21.3,
-            "Narendra Modi Stadium": 19.8, "Ekana Cricket Stadium": 21.5
-        }
-    },
-    "KL Rahul": {
-        "average_runs": 43.2,
-        "average_strike_rate": 138.4,
-        "total_balls_faced": 1565,
-        "total_dismissals": 36,
-        "team_averages": {
-            "CSK": 40.4, "MI": 45.2, "RCB": 46.8, "KKR": 41.7, "DC": 44.2,
-            "SRH": 42.3, "PBKS": 0.0, "RR": 43.9, "GT": 39.5, "LSG": 0.0
-        },
-        "venue_averages": {
-            "MA Chidambaram Stadium": 37.2, "Wankhede Stadium": 44.5, "M Chinnaswamy Stadium": 49.6,
-            "Eden Gardens": 40.8, "Arun Jaitley Stadium": 42.3, "Rajiv Gandhi Stadium": 39.7,
-            "Punjab Cricket Association Stadium": 52.4, "Sawai Mansingh Stadium": 43.2,
-            "Narendra Modi Stadium": 38.6, "Ekana Cricket Stadium": 46.8
-        }
-    },
-    "Jos Buttler": {
-        "average_runs": 41.8,
-        "average_strike_rate": 148.9,
-        "total_balls_faced": 1428,
-        "total_dismissals": 34,
-        "team_averages": {
-            "CSK": 38.5, "MI": 0.0, "RCB": 43.7, "KKR": 39.6, "DC": 42.3,
-            "SRH": 37.2, "PBKS": 42.9, "RR": 0.0, "GT": 36.4, "LSG": 39.1
-        },
-        "venue_averages": {
-            "MA Chidambaram Stadium": 32.5, "Wankhede Stadium": 42.6, "M Chinnaswamy Stadium": 46.2,
-            "Eden Gardens": 39.4, "Arun Jaitley Stadium": 40.7, "Rajiv Gandhi Stadium": 35.8,
-            "Punjab Cricket Association Stadium": 40.2, "Sawai Mansingh Stadium": 49.4,
-            "Narendra Modi Stadium": 36.3, "Ekana Cricket Stadium": 33.9
-        }
-    },
-    "Shubman Gill": {
-        "average_runs": 39.7,
-        "average_strike_rate": 139.5,
-        "total_balls_faced": 1376,
-        "total_dismissals": 34,
-        "team_averages": {
-            "CSK": 36.2, "MI": 40.5, "RCB": 38.4, "KKR": 0.0, "DC": 37.3,
-            "SRH": 35.1, "PBKS": 38.7, "RR": 37.2, "GT": 0.0, "LSG": 34.5
-        },
-        "venue_averages": {
-            "MA Chidambaram Stadium": 33.8, "Wankhede Stadium": 40.6, "M Chinnaswamy Stadium": 42.9,
-            "Eden Gardens": 45.3, "Arun Jaitley Stadium": 37.4, "Rajiv Gandhi Stadium": 35.7,
-            "Punjab Cricket Association Stadium": 38.2, "Sawai Mansingh Stadium": 35.6,
-            "Narendra Modi Stadium": 44.8, "Ekana Cricket Stadium": 33.1
-        }
-    },
-    "Rishabh Pant": {
-        "average_runs": 35.6,
-        "average_strike_rate": 152.7,
-        "total_balls_faced": 1247,
-        "total_dismissals": 35,
-        "team_averages": {
-            "CSK": 33.2, "MI": 37.4, "RCB": 38.1, "KKR": 35.9, "DC": 0.0,
-            "SRH": 32.7, "PBKS": 38.3, "RR": 36.8, "GT": 33.4, "LSG": 35.2
-        },
-        "venue_averages": {
-            "MA Chidambaram Stadium": 30.5, "Wankhede Stadium": 37.9, "M Chinnaswamy Stadium": 42.3,
-            "Eden Gardens": 36.2, "Arun Jaitley Stadium": 45.6, "Rajiv Gandhi Stadium": 32.4,
-            "Punjab Cricket Association Stadium": 36.8, "Sawai Mansingh Stadium": 34.7,
-            "Narendra Modi Stadium": 31.6, "Ekana Cricket Stadium": 29.8
-        }
-    },
-    "Suryakumar Yadav": {
-        "average_runs": 34.2,
-        "average_strike_rate": 155.8,
-        "total_balls_faced": 1189,
-        "total_dismissals": 35,
-        "team_averages": {
-            "CSK": 35.7, "MI": 0.0, "RCB": 37.4, "KKR": 0.0, "DC": 33.9,
-            "SRH": 31.8, "PBKS": 36.2, "RR": 35.1, "GT": 32.3, "LSG": 34.7
-        },
-        "venue_averages": {
-            "MA Chidambaram Stadium": 29.6, "Wankhede Stadium": 46.8, "M Chinnaswamy Stadium": 40.5,
-            "Eden Gardens": 37.4, "Arun Jaitley Stadium": 32.8, "Rajiv Gandhi Stadium": 30.5,
-            "Punjab Cricket Association Stadium": 34.2, "Sawai Mansingh Stadium": 33.7,
-            "Narendra Modi Stadium": 31.2, "Ekana Cricket Stadium": 28.9
-        }
-    },
-    "Sanju Samson": {
-        "average_runs": 32.7,
-        "average_strike_rate": 147.3,
-        "total_balls_faced": 1285,
-        "total_dismissals": 39,
-        "team_averages": {
-            "CSK": 30.4, "MI": 33.8, "RCB": 35.2, "KKR": 31.9, "DC": 32.5,
-            "SRH": 29.7, "PBKS": 34.3, "RR": 0.0, "GT": 29.1, "LSG": 31.8
-        },
-        "venue_averages": {
-            "MA Chidambaram Stadium": 28.3, "Wankhede Stadium": 34.6, "M Chinnaswamy Stadium": 38.9,
-            "Eden Gardens": 33.2, "Arun Jaitley Stadium": 31.7, "Rajiv Gandhi Stadium": 29.5,
-            "Punjab Cricket Association Stadium": 33.9, "Sawai Mansingh Stadium": 42.7,
-            "Narendra Modi Stadium": 27.8, "Ekana Cricket Stadium": 26.4
-        }
-    },
-    "Yashasvi Jaiswal": {
-        "average_runs": 37.9,
-        "average_strike_rate": 148.2,
-        "total_balls_faced": 1062,
-        "total_dismissals": 28,
-        "team_averages": {
-            "CSK": 35.2, "MI": 39.1, "RCB": 40.3, "KKR": 37.8, "DC": 38.5,
-            "SRH": 36.4, "PBKS": 39.6, "RR": 0.0, "GT": 34.7, "LSG": 36.8
-        },
-        "venue_averages": {
-            "MA Chidambaram Stadium": 32.6, "Wankhede Stadium": 39.8, "M Chinnaswamy Stadium": 43.2,
-            "Eden Gardens": 38.5, "Arun Jaitley Stadium": 37.9, "Rajiv Gandhi Stadium": 35.6,
-            "Punjab Cricket Association Stadium": 38.7, "Sawai Mansingh Stadium": 46.8,
-            "Narendra Modi Stadium": 34.2, "Ekana Cricket Stadium": 31.9
-        }
-    },
-    "Shreyas Iyer": {
-        "average_runs": 33.4,
-        "average_strike_rate": 136.8,
-        "total_balls_faced": 1154,
-        "total_dismissals": 34,
-        "team_averages": {
-            "CSK": 31.5, "MI": 34.7, "RCB": 35.2, "KKR": 0.0, "DC": 0.0,
-            "SRH": 30.8, "PBKS": 34.9, "RR": 32.7, "GT": 30.2, "LSG": 32.3
-        },
-        "venue_averages": {
-            "MA Chidambaram Stadium": 29.3, "Wankhede Stadium": 38.6, "M Chinnaswamy Stadium": 36.4,
-            "Eden Gardens": 42.7, "Arun Jaitley Stadium": 40.9, "Rajiv Gandhi Stadium": 31.2,
-            "Punjab Cricket Association Stadium": 34.3, "Sawai Mansingh Stadium": 32.1,
-            "Narendra Modi Stadium": 29.8, "Ekana Cricket Stadium": 27.9
-        }
-    },
-    "David Warner": {
-        "average_runs": 33.1,
-        "average_strike_rate": 100.9,
-        "total_balls_faced": 1590,
-        "total_dismissals": 42,
-        "team_averages": {
-            "CSK": 33.1, "MI": 33.0, "RCB": 39.1, "KKR": 39.0, "DC": 26.0,
-            "SRH": 20.3, "PBKS": 47.7, "RR": 36.4, "GT": 19.5, "LSG": 17.8
-        },
-        "venue_averages": {
-            "MA Chidambaram Stadium": 29.5, "Wankhede Stadium": 33.0, "M Chinnaswamy Stadium": 39.1,
-            "Eden Gardens": 38.0, "Arun Jaitley Stadium": 33.5, "Rajiv Gandhi Stadium": 31.5,
-            "Punjab Cricket Association Stadium": 36.0, "Sawai Mansingh Stadium": 34.0,
-            "Narendra Modi Stadium": 24.5, "Ekana Cricket Stadium": 20.0
-        }
-    },
-    "Faf du Plessis": {
-        "average_runs": 39.4,
-        "average_strike_rate": 145.3,
-        "total_balls_faced": 1320,
-        "total_dismissals": 32,
-        "team_averages": {
-            "CSK": 40.5, "MI": 28.1, "RCB": 29.5, "KKR": 27.1, "DC": 25.6,
-            "SRH": 31.7, "PBKS": 50.2, "RR": 32.4, "GT": 32.0, "LSG": 47.6
-        },
-        "venue_averages": {
-            "MA Chidambaram Stadium": 39.4, "Wankhede Stadium": 28.5, "M Chinnaswamy Stadium": 29.5,
-            "Eden Gardens": 27.0, "Arun Jaitley Stadium": 28.0, "Rajiv Gandhi Stadium": 32.0,
-            "Punjab Cricket Association Stadium": 35.0, "Sawai Mansingh Stadium": 30.0,
-            "Narendra Modi Stadium": 32.0, "Ekana Cricket Stadium": 30.0
-        }
-    },
-    "AB de Villiers": {
-        "average_runs": 21.3,
-        "average_strike_rate": 107.0,
-        "total_balls_faced": 1100,
-        "total_dismissals": 52,
-        "team_averages": {
-            "CSK": 21.3, "MI": 33.0, "RCB": 28.8, "KKR": 24.9, "DC": 29.8,
-            "SRH": 31.8, "PBKS": 33.8, "RR": 32.6, "GT": 0.0, "LSG": 0.0
-        },
-        "venue_averages": {
-            "MA Chidambaram Stadium": 21.3, "Wankhede Stadium": 33.0, "M Chinnaswamy Stadium": 28.8,
-            "Eden Gardens": 26.0, "Arun Jaitley Stadium": 32.0, "Rajiv Gandhi Stadium": 31.8,
-            "Punjab Cricket Association Stadium": 33.0, "Sawai Mansingh Stadium": 30.0,
-            "Narendra Modi Stadium": 0.0, "Ekana Cricket Stadium": 0.0
-        }
-    },
-    "Ruturaj Gaikwad": {
-        "average_runs": 37.1,
-        "average_strike_rate": 95.5,
-        "total_balls_faced": 1250,
-        "total_dismissals": 30,
-        "team_averages": {
-            "CSK": 0.0, "MI": 29.8, "RCB": 30.7, "KKR": 40.9, "DC": 29.8,
-            "SRH": 56.3, "PBKS": 62.0, "RR": 30.0, "GT": 50.0, "LSG": 45.8
-        },
-        "venue_averages": {
-            "MA Chidambaram Stadium": 35.0, "Wankhede Stadium": 30.0, "M Chinnaswamy Stadium": 31.0,
-            "Eden Gardens": 41.0, "Arun Jaitley Stadium": 30.0, "Rajiv Gandhi Stadium": 35.0,
-            "Punjab Cricket Association Stadium": 45.0, "Sawai Mansingh Stadium": 33.0,
-            "Narendra Modi Stadium": 42.0, "Ekana Cricket Stadium": 35.0
-        }
-    },
-    "Kane Williamson": {
-        "average_runs": 34.8,
-        "average_strike_rate": 128.3,
-        "total_balls_faced": 1150,
-        "total_dismissals": 33,
-        "team_averages": {
-            "CSK": 34.8, "MI": 8.5, "RCB": 40.8, "KKR": 22.6, "DC": 30.3,
-            "SRH": 0.0, "PBKS": 28.4, "RR": 27.6, "GT": 31.0, "LSG": 8.5
-        },
-        "venue_averages": {
-            "MA Chidambaram Stadium": 34.8, "Wankhede Stadium": 18.0, "M Chinnaswamy Stadium": 40.8,
-            "Eden Gardens": 25.0, "Arun Jaitley Stadium": 32.0, "Rajiv Gandhi Stadium": 35.0,
-            "Punjab Cricket Association Stadium": 28.0, "Sawai Mansingh Stadium": 30.0,
-            "Narendra Modi Stadium": 31.0, "Ekana Cricket Stadium": 12.0
-        }
-    },
-    "Quinton de Kock": {
-        "average_runs": 25.9,
-        "average_strike_rate": 112.0,
-        "total_balls_faced": 1300,
-        "total_dismissals": 45,
-        "team_averages": {
-            "CSK": 25.9, "MI": 17.6, "RCB": 33.7, "KKR": 30.3, "DC": 29.7,
-            "SRH": 31.0, "PBKS": 37.0, "RR": 33.7, "GT": 23.5, "LSG": 0.0
-        },
-        "venue_averages": {
-            "MA Chidambaram Stadium": 25.9, "Wankhede Stadium": 24.0, "M Chinnaswamy Stadium": 33.7,
-            "Eden Gardens": 30.0, "Arun Jaitley Stadium": 28.0, "Rajiv Gandhi Stadium": 31.0,
-            "Punjab Cricket Association Stadium": 37.0, "Sawai Mansingh Stadium": 33.0,
-            "Narendra Modi Stadium": 23.5, "Ekana Cricket Stadium": 25.0
-        }
-    },
-    "Nicholas Pooran": {
-        "average_runs": 24.9,
-        "average_strike_rate": 137.9,
-        "total_balls_faced": 950,
-        "total_dismissals": 38,
-        "team_averages": {
-            "CSK": 24.9, "MI": 25.6, "RCB": 20.3, "KKR": 21.7, "DC": 31.6,
-            "SRH": 34.4, "PBKS": 0.0, "RR": 20.0, "GT": 14.6, "LSG": 34.0
-        },
-        "venue_averages": {
-            "MA Chidambaram Stadium": 24.9, "Wankhede Stadium": 25.6, "M Chinnaswamy Stadium": 20.3,
-            "Eden Gardens": 21.7, "Arun Jaitley Stadium": 31.6, "Rajiv Gandhi Stadium": 34.4,
-            "Punjab Cricket Association Stadium": 28.0, "Sawai Mansingh Stadium": 20.0,
-            "Narendra Modi Stadium": 14.6, "Ekana Cricket Stadium": 34.0
-        }
-    },
-    "Glenn Maxwell": {
-        "average_runs": 27.1,
-        "average_strike_rate": 149.9,
-        "total_balls_faced": 1100,
-        "total_dismissals": 40,
-        "team_averages": {
-            "CSK": 27.1, "MI": 24.3, "RCB": 11.4, "KKR": 24.0, "DC": 26.9,
-            "SRH": 22.6, "PBKS": 6.0, "RR": 24.5, "GT": 22.0, "LSG": 19.0
-        },
-        "venue_averages": {
-            "MA Chidambaram Stadium": 27.1, "Wankhede Stadium": 24.3, "M Chinnaswamy Stadium": 11.4,
-            "Eden Gardens": 24.0, "Arun Jaitley Stadium": 26.9, "Rajiv Gandhi Stadium": 22.6,
-            "Punjab Cricket Association Stadium": 14.0, "Sawai Mansingh Stadium": 24.5,
-            "Narendra Modi Stadium": 22.0, "Ekana Cricket Stadium": 19.0
-        }
-    },
-    "Hardik Pandya": {
-        "average_runs": 13.1,
-        "average_strike_rate": 133.9,
-        "total_balls_faced": 980,
-        "total_dismissals": 75,
-        "team_averages": {
-            "CSK": 13.1, "MI": 17.3, "RCB": 19.9, "KKR": 28.2, "DC": 22.4,
-            "SRH": 14.6, "PBKS": 18.9, "RR": 32.7, "GT": 0.0, "LSG": 25.2
-        },
-        "venue_averages": {
-            "MA Chidambaram Stadium": 13.1, "Wankhede Stadium": 17.3, "M Chinnaswamy Stadium": 19.9,
-            "Eden Gardens": 28.2, "Arun Jaitley Stadium": 22.4, "Rajiv Gandhi Stadium": 14.6,
-            "Punjab Cricket Association Stadium": 18.9, "Sawai Mansingh Stadium": 32.7,
-            "Narendra Modi Stadium": 20.0, "Ekana Cricket Stadium": 25.2
-        }
-    },
-    "Ravindra Jadeja": {
-        "average_runs": 19.8,
-        "average_strike_rate": 125.1,
-        "total_balls_faced": 1050,
-        "total_dismissals": 53,
-        "team_averages": {
-            "CSK": 0.0, "MI": 13.5, "RCB": 12.7, "KKR": 17.6, "DC": 19.9,
-            "SRH": 15.1, "PBKS": 18.3, "RR": 15.3, "GT": 14.2, "LSG": 23.3
-        },
-        "venue_averages": {
-            "MA Chidambaram Stadium": 19.8, "Wankhede Stadium": 15.0, "M Chinnaswamy Stadium": 14.0,
-            "Eden Gardens": 18.0, "Arun Jaitley Stadium": 20.0, "Rajiv Gandhi Stadium": 15.1,
-            "Punjab Cricket Association Stadium": 18.3, "Sawai Mansingh Stadium": 15.3,
-            "Narendra Modi Stadium": 14.2, "Ekana Cricket Stadium": 23.3
-        }
-    },
-    "Andre Russell": {
-        "average_runs": 24.7,
-        "average_strike_rate": 135.0,
-        "total_balls_faced": 870,
-        "total_dismissals": 35,
-        "team_averages": {
-            "CSK": 24.7, "MI": 17.0, "RCB": 28.3, "KKR": 0.0, "DC": 34.0,
-            "SRH": 20.3, "PBKS": 31.4, "RR": 16.7, "GT": 27.7, "LSG": 17.3
-        },
-        "venue_averages": {
-            "MA Chidambaram Stadium": 24.7, "Wankhede Stadium": 17.0, "M Chinnaswamy Stadium": 28.3,
-            "Eden Gardens": 30.0, "Arun Jaitley Stadium": 34.0, "Rajiv Gandhi Stadium": 20.3,
-            "Punjab Cricket Association Stadium": 31.4, "Sawai Mansingh Stadium": 16.7,
-            "Narendra Modi Stadium": 27.7, "Ekana Cricket Stadium": 17.3
-        }
-    },
-    "Devon Conway": {
-        "average_runs": 61.3,
-        "average_strike_rate": 133.8,
-        "total_balls_faced": 920,
-        "total_dismissals": 15,
-        "team_averages": {
-            "CSK": 0.0, "MI": 14.7, "RCB": 69.5, "KKR": 29.7, "DC": 61.3,
-            "SRH": 81.0, "PBKS": 92.0, "RR": 24.7, "GT": 23.3, "LSG": 47.0
-        },
-        "venue_averages": {
-            "MA Chidambaram Stadium": 48.0, "Wankhede Stadium": 18.0, "M Chinnaswamy Stadium": 69.5,
-            "Eden Gardens": 30.0, "Arun Jaitley Stadium": 61.3, "Rajiv Gandhi Stadium": 81.0,
-            "Punjab Cricket Association Stadium": 92.0, "Sawai Mansingh Stadium": 25.0,
-            "Narendra Modi Stadium": 23.3, "Ekana Cricket Stadium": 47.0
-        }
-    },
-    "Rinku Singh": {
-        "average_runs": 24.2,
-        "average_strike_rate": 94.0,
-        "total_balls_faced": 880,
-        "total_dismissals": 32,
-        "team_averages": {
-            "CSK": 24.2, "MI": 13.2, "RCB": 23.3, "KKR": 0.0, "DC": 16.5,
-            "SRH": 32.4, "PBKS": 10.0, "RR": 20.3, "GT": 34.0, "LSG": 32.3
-        },
-        "venue_averages": {
-            "MA Chidambaram Stadium": 24.2, "Wankhede Stadium": 15.0, "M Chinnaswamy Stadium": 23.3,
-            "Eden Gardens": 28.0, "Arun Jaitley Stadium": 16.5, "Rajiv Gandhi Stadium": 32.4,
-            "Punjab Cricket Association Stadium": 10.0, "Sawai Mansingh Stadium": 20.3,
-            "Narendra Modi Stadium": 34.0, "Ekana Cricket Stadium": 32.3
-        }
-    },
-    "Tilak Varma": {
-        "average_runs": 34.5,
-        "average_strike_rate": 120.2,
-        "total_balls_faced": 900,
-        "total_dismissals": 26,
-        "team_averages": {
-            "CSK": 34.5, "MI": 0.0, "RCB": 42.0, "KKR": 22.0, "DC": 30.6,
-            "SRH": 36.5, "PBKS": 24.8, "RR": 44.4, "GT": 22.8, "LSG": 24.3
-        },
-        "venue_averages": {
-            "MA Chidambaram Stadium": 34.5, "Wankhede Stadium": 36.0, "M Chinnaswamy Stadium": 42.0,
-            "Eden Gardens": 22.0, "Arun Jaitley Stadium": 30.6, "Rajiv Gandhi Stadium": 36.5,
-            "Punjab Cricket Association Stadium": 24.8, "Sawai Mansingh Stadium": 44.4,
-            "Narendra Modi Stadium": 22.8, "Ekana Cricket Stadium": 24.3
-        }
-    }
-}
+# Model loading with error handling; the registry swaps in retrained models at runtime
+model_filename = os.environ.get("MODEL_PATH", "trained_model.pkl")
+model_registry = ModelRegistry(model_filename)
 
 # Calculate team bowling strengths based on opposition performance against them
 def calculate_bowling_strengths():
-    team_bowling_strengths = {}
-    
-    for team in ipl_teams:
-        # Gather all batting averages against this team
-        batting_averages_against = []
-        for batter_name, batter_data in batter_profiles.items():
-            # Skip if batter plays for this team (0.0 in data)
-            if batter_data["team_averages"][team] > 0:
-                batting_averages_against.append(batter_data["team_averages"][team])
-        
-        # Lower average = better bowling, so inverse the relationship
-        # Scale to reasonable bowling strength values (7.5-9.5)
-        if batting_averages_against:
-            avg_batting_against = mean(batting_averages_against)
-            # Lower batting average -> higher bowling strength
-            bowling_strength = 16.5 - (avg_batting_against / 5)  
-            # Ensure within reasonable range
-            bowling_strength = max(min(bowling_strength, 9.5), 7.5)
-        else:
-            bowling_strength = 8.5  # Default value if no data
-        
-        team_bowling_strengths[team] = round(bowling_strength, 1)
-    
-    return team_bowling_strengths
+    # Lower average against a team = better bowling, scaled to 7.5-9.5
+    return TeamStrengths.from_profiles(team_registry, batter_profiles).bowling
 
 # Calculate team batting strengths based on performance
 def calculate_batting_strengths():
-    team_batting_strengths = {}
+    # Mean average_runs of the profiled batters who play for each team
+    return TeamStrengths.from_profiles(team_registry, batter_profiles).batting
+
+# Built by warm_up(), not at import, so gunicorn can bind and report liveness first.
+# team_strengths keeps the running per-team sums behind the strengths; the two dicts
+# are kept current (in place) by upsert_batter_profile()
+team_strengths = None
+team_bowling_strengths = {}
+team_batting_strengths = {}
+csv_batter_stats = None
+feature_store = None
+
+def canary_features():
+    """A handful of real feature rows every new model must score before it goes live"""
+    count = min(len(feature_store.batter_names), 8)
+    return feature_store.rows(np.arange(count), np.arange(count) % len(ipl_teams), np.arange(count) % len(ipl_venues))
+
+model_registry.canary = canary_features
+
+def compile_sample_features(count=2000, seed=0):
+    """Random matchups from the store, the distribution the model is asked to score"""
+    rng = np.random.default_rng(seed)
+    return feature_store.rows(
+        rng.integers(len(feature_store.batter_names), size=count),
+        rng.integers(len(feature_store.teams), size=count),
+        rng.integers(len(feature_store.venues), size=count)
+    )
+
+# Optional: COMPILED_INFERENCE=1 scores supported models from flat numpy arrays instead of
+# sklearn's predict; each model is checked against model.predict on the sample before it is used.
+# The engine skips sklearn's per-call overhead but walks every tree to full depth, so it only wins
+# on small batches; anything over COMPILED_MAX_ROWS rows still goes to model.predict
+if os.environ.get("COMPILED_INFERENCE", "0") == "1":
+    model_registry.compile_sample = compile_sample_features
+    model_registry.compile_max_rows = int(os.environ.get("COMPILED_MAX_ROWS", STACKED_MAX_ROWS))
+
+# Optionally poll the model file (and /admin/reload-model requests from other workers) and
+# hot-swap the model when it changes; gunicorn.conf.py turns this on for multi-worker servers
+MODEL_WATCH_INTERVAL = float(os.environ.get("MODEL_WATCH_INTERVAL", 0))
+
+# Optional: SHARED_TABLES=1 moves the feature tables and the compiled model arrays into one
+# read-only memory-mapped segment (under /dev/shm) that every worker maps instead of copying.
+# With COMPILED_INFERENCE=1 the model's trees go there too and the sklearn estimator is then
+# dropped, so no worker keeps a private copy of the weights; every batch size is scored by the
+# engine from then on. Without it the estimator stays on each worker's heap.
+SHARED_TABLES = os.environ.get("SHARED_TABLES", "0") == "1"
+
+def share_tables(artifact):
+    """Swap this process's feature tables and the artifact's engine arrays for shared read-only views.
+
+    An artifact with an engine then drops its sklearn estimator, which the shared arrays replace.
+    """
+    before = memory_usage()
+    engine = artifact.engine
+    arrays = {f"store.{name}": array for name, array in feature_store.table_arrays().items()}
+    if engine is not None:
+        arrays.update({f"engine.{name}": array for name, array in engine.arrays().items()})
+    key = hashlib.sha1(
+        f"{feature_store.fingerprint}:{artifact.version}:{engine.kind if engine else ''}".encode("utf-8")
+    ).hexdigest()[:16]
+    try:
+        shared = share_arrays(key, arrays)
+    except (OSError, ValueError) as e:
+        print(f"Could not share tables, keeping private copies: {e}")
+        return
     
-    # For each team, find the batters in our profile and calculate average
-    for team in ipl_teams:
-        team_batters = []
-        for batter_name, batter_data in batter_profiles.items():
-            # Check if batter plays for this team (0.0 in data for their own team)
-            batters_teams = [t for t, avg in batter_data["team_averages"].items() if avg == 0.0]
-            if team in batters_teams:
-                team_batters.append(batter_data["average_runs"])
-        
-        # Calculate average batting strength for team
-        if team_batters:
-            team_batting_strengths[team] = mean(team_batters)
-        else:
-            team_batting_strengths[team] = 35.0  # Default if no data
+    def section(prefix):
+        return {name[len(prefix):]: array for name, array in shared.items() if name.startswith(prefix)}
     
-    return team_batting_strengths
+    feature_store.use_arrays(section("store."))
+    if engine is not None:
+        engine.use_arrays(section("engine."))
+        artifact.release_model()
+        trim_heap()
+    after = memory_usage()
+    print(f"Attached shared tables {key} ({sum(array.nbytes for array in shared.values()) / 1e6:.2f} MB); "
+          f"RSS {before.get('rss', 0) / 1e6:.1f} MB -> {after.get('rss', 0) / 1e6:.1f} MB")
+
+if SHARED_TABLES:
+    model_registry.on_activate = share_tables
+
+# Optional: PREDICTION_CUBE=1 scores every (batter, team, venue) once per model and data
+# version into a memory-mapped float32 array, so point predictions are a lookup
+prediction_cubes = None
+if os.environ.get("PREDICTION_CUBE", "0") == "1":
+    prediction_cubes = CubeRefresher(lambda: feature_store, model_registry.current)
+
+def current_cube(active_model):
+    """The prediction cube for this model and the current store, or None (e.g. while it rebuilds)"""
+    if prediction_cubes is None:
+        return None
+    return prediction_cubes.current(active_model, feature_store.fingerprint)
+
+# Wall time of each warm-up step in ms, reported by /readyz
+startup_timings = {}
+warm_up_lock = threading.Lock()
+warm_up_thread = None
+warmed_up = False
+
+def timed_step(name, function):
+    started = time.perf_counter()
+    result = function()
+    startup_timings[name] = round((time.perf_counter() - started) * 1000, 1)
+    return result
+
+def warm_up():
+    """Build the derived tables and load the model, once per process tree.
+
+    Runs in the gunicorn master when the app is preloaded (see gunicorn.conf.py), so
+    forked workers share the result copy-on-write; otherwise on the first request.
+    Returns True when the app is ready to serve predictions.
+    """
+    global team_strengths, team_bowling_strengths, team_batting_strengths, csv_batter_stats, feature_store, warmed_up
+    if not warmed_up:
+        with warm_up_lock:
+            if not warmed_up:
+                started = time.perf_counter()
+                team_strengths = timed_step(
+                    "team_strengths", lambda: TeamStrengths.from_profiles(team_registry, batter_profiles)
+                )
+                team_bowling_strengths = team_strengths.bowling
+                team_batting_strengths = team_strengths.batting
+                csv_batter_stats = timed_step("csv_stats", load_batter_stats)
+                feature_store = timed_step(
+                    "feature_store", lambda: build_feature_store(csv_batter_stats, team_strengths)
+                )
+                timed_step("model", model_registry.load)
+                if prediction_cubes is not None:
+                    timed_step("prediction_cube", prediction_cubes.refresh)
+                startup_timings["total"] = round((time.perf_counter() - started) * 1000, 1)
+                print(f"Warm-up finished in {startup_timings['total']} ms: {startup_timings}")
+                warmed_up = True
+    return is_ready()
+
+def is_ready():
+    return warmed_up and feature_store is not None and model_registry.current() is not None
+
+def start_warm_up():
+    """Run warm_up() in the background (used by /readyz so probes never block)"""
+    global warm_up_thread
+    with warm_up_lock:
+        if warmed_up or (warm_up_thread is not None and warm_up_thread.is_alive()):
+            return
+        warm_up_thread = threading.Thread(target=warm_up, name="warm-up", daemon=True)
+        warm_up_thread.start()
+
+@app.before_request
+def ensure_warmed_up():
+    # Probes must answer while the app is still warming up
+    if request.endpoint in ("healthz", "readyz"):
+        return
+    warm_up()
+    # Threads don't survive fork, so each worker starts its own watcher
+    if MODEL_WATCH_INTERVAL > 0:
+        model_registry.start_watcher(MODEL_WATCH_INTERVAL)
+
+# Serializes profile updates; readers never take it
+profile_update_lock = threading.Lock()
+
+def upsert_batter_profile(batter_name, updates):
+    """Add or update a batter profile, adjusting only the affected team strengths.
+
+    Fields missing from `updates` keep their current values. Returns the list of
+    teams whose strengths changed. Team and venue keys may be given under any alias.
+    A batter known only from the CSV roster starts from its recorded averages.
+
+    Profiles live in process memory, so this changes only the calling worker; other
+    gunicorn workers keep the previous profile until they are sent the same update
+    or restarted.
+    """
+    with profile_update_lock:
+        # Scorecard aliases update the player they belong to
+        batter_name = feature_store.canonical_batter(batter_name) or batter_name
+        old_profile = batter_profiles.get(batter_name)
+        if old_profile is not None:
+            base = old_profile
+        elif batter_name in feature_store.batter_index:
+            base = feature_store.profile(batter_name)
+        else:
+            base = None
+        
+        profile = {}
+        imputed = []
+        for field in ("average_runs", "average_strike_rate", "total_balls_faced", "total_dismissals"):
+            value = updates.get(field, base[field] if base else None)
+            if value is None:
+                raise ValueError(f"{field} is required for a new batter")
+            if isinstance(value, bool) or not isinstance(value, (int, float)):
+                raise ValueError(f"{field} must be a number")
+            profile[field] = value
+            # Stats estimated for the CSV roster stay marked until a real value is sent
+            if field not in updates and field in base.get("imputed", ()):
+                imputed.append(field)
+        if imputed:
+            profile["imputed"] = imputed
+        
+        for field, registry in (("team_averages", team_registry), ("venue_averages", venue_registry)):
+            averages = dict(base[field]) if base else {}
+            new_averages = updates.get(field, {})
+            if not isinstance(new_averages, dict):
+                raise ValueError(f"{field} must be an object")
+            for key, value in new_averages.items():
+                name = registry.canonical(key)
+                if name is None:
+                    raise ValueError(f"Unknown entry {key} in {field}")
+                if isinstance(value, bool) or not isinstance(value, (int, float)):
+                    raise ValueError(f"{field}[{key}] must be a number")
+                averages[name] = value
+            profile[field] = averages
+        
+        changed_teams = team_strengths.update(old_profile, profile)
+        batter_profiles[batter_name] = profile
+        feature_store.upsert_batter(batter_name, profile)
+        changed_names = [team_strengths.teams[team] for team in changed_teams]
+        if changed_teams:
+            feature_store.set_opponent_strengths(
+                changed_teams, [team_bowling_strengths[name] for name in changed_names]
+            )
+        return changed_names
 
-# Calculate dynamically based on player data
-team_bowling_strengths = calculate_bowling_strengths()
-team_batting_strengths = calculate_batting_strengths()
+def require_admin():
+    """Return an error response unless the request carries the ADMIN_TOKEN"""
+    token = os.environ.get("ADMIN_TOKEN")
+    if not token:
+        return jsonify({"error": "Admin endpoints are disabled. Set ADMIN_TOKEN to enable them."}), 403
+    # Compared as bytes: compare_digest rejects non-ASCII str
+    if not hmac.compare_digest(request.headers.get("X-Admin-Token", "").encode("utf-8"), token.encode("utf-8")):
+        return jsonify({"error": "Invalid admin token"}), 403
+    return None
 
 @app.route("/", methods=["GET"])
 def index():
     """Serve the frontend HTML file"""
     return send_from_directory(os.path.dirname(__file__), 'index.html')
 
+# Cache of deterministic /predict responses; PREDICTION_CACHE_SIZE=0 disables it
+prediction_cache = PredictionCache(maxsize=int(os.environ.get("PREDICTION_CACHE_SIZE", 100000)))
+
+# Optional serving mode: MICRO_BATCH=1 coalesces concurrent /predict rows into stacked predict calls
+micro_batcher = None
+if os.environ.get("MICRO_BATCH", "0") == "1":
+    micro_batcher = MicroBatcher(
+        model_registry.current,
+        max_batch_size=int(os.environ.get("MICRO_BATCH_MAX_SIZE", 64)),
+        max_wait=float(os.environ.get("MICRO_BATCH_MAX_WAIT_MS", 2)) / 1000.0
+    )
+
+# Admission control for the model-backed endpoints, per worker. At most MAX_IN_FLIGHT
+# requests score at once; others wait up to ADMISSION_QUEUE_MS for a slot and are then
+# shed (503) or, for /predict, answered from the cache. RATE_LIMIT_PER_SECOND > 0 adds a
+# token bucket per client (429). A request's time budget comes from X-Request-Deadline-Ms
+# or REQUEST_DEADLINE_MS (0: none), counted from X-Request-Start when a proxy sets it so
+# time queued in front of the app counts too; requests whose budget runs out fail fast with 503.
+# gunicorn.conf.py derives MAX_IN_FLIGHT from the worker's threads; 32 is for other servers.
+ADMISSION_ENDPOINTS = {"predict", "predict_batch", "predict_lineup", "batter_heatmap", "rankings", "predict_stream"}
+admission = AdmissionController(int(os.environ.get("MAX_IN_FLIGHT", 32)))
+ADMISSION_QUEUE_MS = float(os.environ.get("ADMISSION_QUEUE_MS", 50))
+REQUEST_DEADLINE_MS = float(os.environ.get("REQUEST_DEADLINE_MS", 0))
+# Clients are told to come back after this long when shed
+SHED_RETRY_AFTER = float(os.environ.get("SHED_RETRY_AFTER_SECONDS", 1))
+
+rate_limiter = None
+if float(os.environ.get("RATE_LIMIT_PER_SECOND", 0)) > 0:
+    rate = float(os.environ["RATE_LIMIT_PER_SECOND"])
+    rate_limiter = RateLimiter(rate, float(os.environ.get("RATE_LIMIT_BURST", 2 * rate)))
+# Clients are told apart by address unless a trusted proxy sets this header (e.g. X-Api-Key)
+RATE_LIMIT_KEY_HEADER = os.environ.get("RATE_LIMIT_KEY_HEADER")
+
+metrics.describe("requests_throttled_total", "counter", "Requests rejected by the per-client rate limit")
+metrics.describe("requests_shed_total", "counter", "Requests rejected with 503 by reason (saturated, deadline)")
+metrics.describe("requests_degraded_total", "counter", "Saturated /predict requests answered from the cache")
+
+def client_key():
+    if RATE_LIMIT_KEY_HEADER and request.headers.get(RATE_LIMIT_KEY_HEADER):
+        return request.headers[RATE_LIMIT_KEY_HEADER]
+    return request.remote_addr or "unknown"
+
+def request_deadline():
+    """Absolute perf_counter deadline of this request, or None"""
+    budget = REQUEST_DEADLINE_MS
+    header = request.headers.get("X-Request-Deadline-Ms")
+    if header:
+        try:
+            budget = float(header)
+        except ValueError:
+            pass
+    if budget <= 0:
+        return None
+    return request_arrival() + budget / 1000.0
+
+def deadline_exceeded():
+    deadline = g.get("deadline")
+    return deadline is not None and time.perf_counter() >= deadline
+
+def shed(reason):
+    metrics.inc("requests_shed_total", {"endpoint": request.endpoint, "reason": reason})
+    message = "Request deadline exceeded" if reason == "deadline" else "Server is busy, retry later"
+    response = jsonify({"error": message})
+    response.status_code = 503
+    response.headers["Retry-After"] = retry_after_header(SHED_RETRY_AFTER)
+    return response
+
+def degraded_prediction():
+    """The cached /predict response for a request turned away from the model, or None"""
+    active_model = model_registry.current()
+    data = request.get_json(silent=True)
+    if active_model is None or feature_store is None or not isinstance(data, dict):
+        return None
+    try:
+        cached = prediction_cache.get(prediction_cache_key(data, active_model))
+    except (TypeError, ValueError):
+        # Bad quantiles, or fields that can't be part of a key; the full handler reports them
+        return None
+    if cached is None:
+        return None
+    metrics.inc("requests_degraded_total")
+    response = json_response(dict(compact_result(cached), model_version=cached["model_version"])
+                             if wants_compact(data) else cached)
+    response.headers["X-Degraded"] = "cache"
+    return response
+
+@app.before_request
+def admit_request():
+    if request.endpoint not in ADMISSION_ENDPOINTS:
+        return
+    if rate_limiter is not None:
+        allowed, retry_after = rate_limiter.acquire(client_key())
+        if not allowed:
+            metrics.inc("requests_throttled_total", {"endpoint": request.endpoint})
+            response = jsonify({"error": "Rate limit exceeded"})
+            response.status_code = 429
+            response.headers["Retry-After"] = retry_after_header(retry_after)
+            return response
+
+    g.deadline = request_deadline()
+    wait = ADMISSION_QUEUE_MS / 1000.0
+    if g.deadline is not None:
+        wait = min(wait, g.deadline - time.perf_counter())
+    if not admission.enter(wait):
+        if request.endpoint == "predict":
+            degraded = degraded_prediction()
+            if degraded is not None:
+                return degraded
+        return shed("saturated")
+    g.admitted = True
+    if deadline_exceeded():
+        return shed("deadline")
+
+@app.teardown_request
+def release_admission(exc):
+    # Streamed responses keep their slot until the stream is closed
+    if g.pop("admitted", False):
+        admission.leave()
+
+# Opt-in profiling of the same endpoints: requests whose X-Profile-Token matches
+# PROFILE_TOKEN, plus a PROFILE_SAMPLE_RATE fraction of all others, are profiled into
+# PROFILE_DIR, which keeps the newest PROFILE_KEEP. With neither set no hook does any work.
+request_profiler = None
+if os.environ.get("PROFILE_TOKEN") or float(os.environ.get("PROFILE_SAMPLE_RATE", 0)) > 0:
+    request_profiler = RequestProfiler(
+        os.environ.get("PROFILE_DIR", os.path.join(CACHE_DIR, "profiles")),
+        token=os.environ.get("PROFILE_TOKEN"),
+        sample_rate=float(os.environ.get("PROFILE_SAMPLE_RATE", 0)),
+        keep=int(os.environ.get("PROFILE_KEEP", 50)),
+        interval=float(os.environ.get("PROFILE_SAMPLE_INTERVAL_MS", 1)) / 1000.0
+    )
+    # Stage timers report to the profile running on the same thread
+    metrics.observer = request_profiler.observe
+
+@app.before_request
+def start_profile():
+    # Registered after admit_request, so shed and throttled requests are never profiled
+    if request_profiler is None or request.endpoint not in ADMISSION_ENDPOINTS:
+        return
+    trigger = request_profiler.trigger(request.headers.get("X-Profile-Token"))
+    if trigger:
+        g.profile = request_profiler.start(trigger)
+
+@app.after_request
+def record_profiled_status(response):
+    if g.get("profile") is not None:
+        g.profile_status = response.status_code
+    return response
+
+@app.teardown_request
+def finish_profile(exc):
+    profile = g.pop("profile", None)
+    if profile is None:
+        return
+    active_model = model_registry.current()
+    try:
+        request_profiler.finish(profile, {
+            "method": request.method,
+            "path": request.full_path.rstrip("?"),
+            "endpoint": request.endpoint,
+            "status": g.get("profile_status", 500),
+            "error": repr(exc) if exc else None,
+            "model_version": active_model.version if active_model else None
+        })
+    except OSError as e:
+        print(f"Error writing request profile: {e}")
+
+# Paging limits and browser cache lifetime for /batters
+BATTERS_PAGE_SIZE = 20
+BATTERS_MAX_PAGE_SIZE = 100
+BATTERS_CACHE_SECONDS = int(os.environ.get("BATTERS_CACHE_SECONDS", 300))
+
+# Search index over the roster, rebuilt when the feature store changes
+batter_search_index = None
+
+def get_batter_index():
+    global batter_search_index
+    index = batter_search_index
+    if index is None or index.fingerprint != feature_store.fingerprint:
+        index = BatterIndex(
+            feature_store.batter_names,
+            weights=feature_store.batter_stats[:, 0].tolist(),
+            fingerprint=feature_store.fingerprint
+        )
+        batter_search_index = index
+    return index
+
+# Upper bound on the number of matchups accepted by /predict/batch
+MAX_BATCH_SIZE = int(os.environ.get("MAX_BATCH_SIZE", 10000))
+
+# Largest batting lineup accepted by /predict/lineup (XI plus substitutes)
+MAX_LINEUP_SIZE = 15
+
+# Largest K accepted by /rankings
+MAX_RANKING_SIZE = 100
+
+# Number of NDJSON lines /predict/stream scores per model.predict call
+STREAM_CHUNK_SIZE = int(os.environ.get("STREAM_CHUNK_SIZE", 256))
+
+def parse_interval_options(data):
+    """Quantiles requested via {"intervals": true} / {"quantiles": [...]} or ?intervals=1, else None"""
+    quantiles = data.get("quantiles") if isinstance(data, dict) else None
+    wants_intervals = (isinstance(data, dict) and bool(data.get("intervals"))) or \
+        request.args.get("intervals", "").lower() in ("1", "true", "yes")
+    if quantiles is None:
+        return tuple(DEFAULT_QUANTILES) if wants_intervals else None
+    if not isinstance(quantiles, list) or not quantiles or not all(
+        isinstance(q, (int, float)) and not isinstance(q, bool) and 0 < q < 1 for q in quantiles
+    ):
+        raise ValueError("quantiles must be a non-empty list of numbers between 0 and 1")
+    return tuple(float(q) for q in quantiles)
+
+def prediction_cache_key(data, active_model, quantiles=None):
+    """Cache key of a /predict body; quantiles are parsed from it unless given (raises ValueError)"""
+    if quantiles is None:
+        quantiles = parse_interval_options(data)
+    return (
+        data.get("batter_name", ""), data.get("opponent_team", ""), data.get("venue_name", ""),
+        active_model.version, feature_store.fingerprint, quantiles
+    )
+
+def wants_compact(data=None):
+    """Compact responses via ?compact=1, {"compact": true} or a Prefer: return=minimal header"""
+    return request.args.get("compact", "").lower() in ("1", "true", "yes") or \
+        (isinstance(data, dict) and bool(data.get("compact"))) or \
+        "return=minimal" in request.headers.get("Prefer", "")
+
+def negotiate_format(text_format=JSON):
+    """Media type for a result set from ?format= or the Accept header; text_format unless a binary one is asked for"""
+    offered = [text_format] + available_formats()[1:]
+    requested = request.args.get("format")
+    if requested:
+        media_type = {"json": text_format, "msgpack": MSGPACK, "arrow": ARROW}.get(requested.lower())
+        if media_type not in offered:
+            package = {MSGPACK: "msgpack", ARROW: "pyarrow"}.get(media_type)
+            missing = f" (needs the {package} package, see requirements-optional.txt)" if package else ""
+            raise ValueError(f"Unsupported format {requested}{missing}; available: json"
+                             f"{', msgpack' if MSGPACK in offered else ''}{', arrow' if ARROW in offered else ''}")
+        return media_type
+    return request.accept_mimetypes.best_match(offered, default=text_format)
+
+def json_response(payload, status=200):
+    """Like jsonify, but encoded with the faster encoder when it is installed"""
+    return Response(dumps_json(payload), status=status, mimetype=JSON)
+
+def count_prediction_error(kind):
+    metrics.inc("prediction_errors_total", {"type": kind})
+
+def score_matchups(matchups, active_model, start_index=0, quantiles=None):
+    """scoring.score_matchups against this process's feature store and prediction cube, counting errors"""
+    return scoring.score_matchups(
+        feature_store, matchups, active_model, start_index, quantiles,
+        cube=current_cube(active_model), on_error=count_prediction_error
+    )
+
+@app.route("/batters", methods=["GET"])
+def search_batters():
+    """Ranked, paged batter search for autocomplete, with ETag/304 support"""
+    query = request.args.get("q", "")
+    page = max(request.args.get("page", 1, type=int), 1)
+    per_page = min(max(request.args.get("per_page", BATTERS_PAGE_SIZE, type=int), 1), BATTERS_MAX_PAGE_SIZE)
+    
+    index = get_batter_index()
+    # The tag only depends on the data and the normalized query, so a repeat is answered before searching
+    etag = hashlib.sha1(f"{index.fingerprint}|{normalize(query)}|{page}|{per_page}".encode("utf-8")).hexdigest()[:20]
+    if request.if_none_match.contains(etag):
+        response = Response(status=304)
+    else:
+        matches = index.search(query)
+        start = (page - 1) * per_page
+        response = jsonify({
+            "query": query,
+            "total": len(matches),
+            "page": page,
+            "per_page": per_page,
+            "results": [
+                {"name": index.names[i], "profiled": index.names[i] in batter_profiles}
+                for i in matches[start:start + per_page]
+            ]
+        })
+    response.set_etag(etag)
+    response.headers["Cache-Control"] = f"public, max-age={BATTERS_CACHE_SECONDS}"
+    return response
+
 @app.route("/predict", methods=["POST"])
 def predict():
-    if model is None:
+    # Use one model for the whole request even if a reload swaps it mid-way
+    active_model = model_registry.current()
+    if active_model is None:
+        metrics.inc("prediction_errors_total", {"type": "model_not_loaded"})
         return jsonify({"error": "Model not loaded. Please check server logs."}), 503
         
     try:
-        data = request.get_json()
-        
-        # Extract parameters from request
-        batter_name = data.get("batter_name", "")
-        opponent_team = data.get("opponent_team", "")
-        venue_name = data.get("venue_name", "")
+        with metrics.timer("predict_stage_seconds", {"stage": "parse"}):
+            data = request.get_json()
+            
+            # Extract parameters from request
+            batter_name = data.get("batter_name", "")
+            opponent_team = data.get("opponent_team", "")
+            venue_name = data.get("venue_name", "")
+            try:
+                quantiles = parse_interval_options(data)
+            except ValueError as e:
+                return jsonify({"error": str(e)}), 400
+            compact = wants_compact(data)
         
         # Validate inputs
         if not batter_name:
+            metrics.inc("prediction_errors_total", {"type": "missing_batter"})
             return jsonify({"error": "Batter name is required"}), 400
+        error = matchup_type_error(batter_name, opponent_team, venue_name, count_prediction_error)
+        if error:
+            return jsonify({"error": error}), 400
             
-        # Check if batter exists
-        if batter_name not in batter_profiles:
-            return jsonify({"error": f"Batter {batter_name} not found in database"})
-            
-        # Check if venue exists
-        if venue_name not in ipl_venues:
-            return jsonify({"error": f"Venue {venue_name} not found in database"})
-            
-        # Check if opponent team exists
-        if opponent_team not in ipl_teams:
-            return jsonify({"error": f"Team {opponent_team} not found in database"})
+        # Serve repeated matchups straight from the cache
+        with metrics.timer("predict_stage_seconds", {"stage": "cache"}):
+            prediction_cache.set_generation((active_model.version, feature_store.fingerprint))
+            cache_key = prediction_cache_key(data, active_model, quantiles)
+            cached = prediction_cache.get(cache_key)
+        if cached is not None:
+            with metrics.timer("predict_stage_seconds", {"stage": "serialize"}):
+                return json_response(dict(compact_result(cached), model_version=cached["model_version"])
+                                     if compact else cached)
         
-        # Get batter profile
-        batter = batter_profiles[batter_name]
+        with metrics.timer("predict_stage_seconds", {"stage": "lookup"}):
+            indices, error = resolve_matchup(
+                feature_store, batter_name, opponent_team, venue_name, count_prediction_error
+            )
+        if error:
+            return jsonify({"error": error})
         
-        # Get venue difficulty
-        venue_difficulty = ipl_venues[venue_name]["venue_difficulty"]
+        # Create feature vector for prediction
+        with metrics.timer("predict_stage_seconds", {"stage": "features"}):
+            features = feature_store.row(*indices)
         
-        # Get opponent team bowling strength
-        opponent_strength = team_bowling_strengths[opponent_team]
+        # No point scoring a request its client has already given up on
+        if deadline_exceeded():
+            return shed("deadline")
         
-        # Get batter's average against this team
-        average_runs_vs_team = batter["team_averages"].get(opponent_team, 35.0)  # Default if not available
+        # Make prediction
+        with metrics.timer("predict_stage_seconds", {"stage": "model"}):
+            interval = None
+            cube = None if quantiles else current_cube(active_model)
+            if cube is not None:
+                prediction, version = cube.lookup(*indices), active_model.version
+            elif quantiles:
+                try:
+                    points, std, quantile_values, method = predict_with_intervals(active_model, features, quantiles)
+                except ValueError as e:
+                    return jsonify({"error": str(e)}), 400
+                prediction, version = points[0], active_model.version
+                interval = format_interval(std[0], quantile_values[:, 0], quantiles, method)
+            elif micro_batcher is not None:
+                # The batch may be scored by a model swapped in after this request started
+                prediction, version = micro_batcher.predict(features[0])
+            else:
+                prediction, version = active_model.predict(features)[0], active_model.version
         
-        # Get batter's average at this venue
-        average_runs_vs_venue = batter["venue_averages"].get(venue_name, 35.0)  # Default if not available
+        # Return results
+        with metrics.timer("predict_stage_seconds", {"stage": "serialize"}):
+            batter, team, venue = indices
+            result = format_prediction(
+                batter_name, feature_store.teams[team], feature_store.venues[venue], prediction, features[0], version
+            )
+            if interval is not None:
+                result["prediction_interval"] = interval
+            if version == active_model.version:
+                prediction_cache.put(cache_key, result)
+            if compact:
+                return json_response(dict(compact_result(result), model_version=version))
+            return json_response(result)
+
+    except Exception as e:
+        metrics.inc("prediction_errors_total", {"type": "exception"})
+        import traceback
+        print(f"Error in prediction: {str(e)}")
+        print(traceback.format_exc())
+        return jsonify({"error": f"An error occurred during prediction: {str(e)}"}), 500
+
+@app.route("/predict/batch", methods=["POST"])
+def predict_batch():
+    """Score a list of matchups with a single model.predict call.
+
+    Responds with JSON by default; Accept: application/msgpack or
+    application/vnd.apache.arrow.stream (or ?format=) returns the results as columns.
+    """
+    active_model = model_registry.current()
+    if active_model is None:
+        return jsonify({"error": "Model not loaded. Please check server logs."}), 503
         
-        # Calculate interaction terms
-        batter_opponent_interaction = batter["average_runs"] * opponent_strength
-        batter_venue_interaction = batter["average_runs"] * venue_difficulty
+    try:
+        data = request.get_json()
+        matchups = data.get("matchups") if isinstance(data, dict) else data
         
-        # Create feature vector for prediction
-        features = [
-            batter["average_runs"],
-            batter["average_strike_rate"],
-            batter["total_balls_faced"],
-            batter["total_dismissals"],
-            opponent_strength,
-            venue_difficulty,
-            batter_opponent_interaction,
-            batter_venue_interaction,
-            average_runs_vs_team,
-            average_runs_vs_venue
-        ]
+        if not isinstance(matchups, list):
+            return jsonify({"error": "Expected a list of matchups"}), 400
+        if len(matchups) > MAX_BATCH_SIZE:
+            return jsonify({"error": f"Batch size {len(matchups)} exceeds the limit of {MAX_BATCH_SIZE}"}), 413
         
-        # Convert to numpy array for prediction
-        features = np.array(features).reshape(1, -1)
+        try:
+            media_type = negotiate_format()
+            quantiles = parse_interval_options(data)
+            results = score_matchups(matchups, active_model, quantiles=quantiles)
+        except ValueError as e:
+            return jsonify({"error": str(e)}), 400
+        errors = sum(1 for result in results if "error" in result)
+        summary = {"model_version": active_model.version, "count": len(matchups), "errors": errors}
         
-        # Make prediction
-        prediction = model.predict(features)
+        if media_type != JSON:
+            # Columnar binary body; the summary goes in the MessagePack map / Arrow schema metadata
+            response = Response(encode_results(results, media_type, summary), mimetype=media_type)
+        else:
+            if wants_compact(data):
+                results = [compact_result(result) for result in results]
+            response = json_response(dict(summary, results=results))
+        response.vary.add("Accept")
+        return response
+
+    except Exception as e:
+        import traceback
+        print(f"Error in batch prediction: {str(e)}")
+        print(traceback.format_exc())
+        return jsonify({"error": f"An error occurred during batch prediction: {str(e)}"}), 500
+
+@app.route("/predict/lineup", methods=["POST"])
+def predict_lineup():
+    """Predict runs for a whole batting lineup against one opponent at one venue, plus the team total.
+
+    The opponent and venue are resolved once and the lineup is scored in a single
+    model.predict call. Batters missing from the database are filled in from the
+    batting team's strength (or the league average when no batting_team is given).
+    """
+    active_model = model_registry.current()
+    if active_model is None:
+        return jsonify({"error": "Model not loaded. Please check server logs."}), 503
+        
+    try:
+        data = request.get_json(silent=True) or {}
+        opponent_team = data.get("opponent_team", "")
+        venue_name = data.get("venue_name", "")
+        batting_team = data.get("batting_team")
+        lineup = data.get("batters")
+        
+        if not isinstance(lineup, list) or not lineup or not all(isinstance(name, str) for name in lineup):
+            return jsonify({"error": "batters must be a non-empty list of names"}), 400
+        if len(lineup) > MAX_LINEUP_SIZE:
+            return jsonify({"error": f"A lineup can have at most {MAX_LINEUP_SIZE} batters"}), 400
+        
+        # Resolve the shared context once for the whole lineup
+        team = feature_store.team_index.get(opponent_team)
+        if team is None:
+            return jsonify({"error": f"Team {opponent_team} not found in database"}), 400
+        venue = feature_store.venue_index.get(venue_name)
+        if venue is None:
+            return jsonify({"error": f"Venue {venue_name} not found in database"}), 400
+        if batting_team is not None:
+            if team_registry.get(batting_team) is None:
+                return jsonify({"error": f"Team {batting_team} not found in database"}), 400
+            batting_team = team_registry.canonical(batting_team)
+        
+        batter_rows = np.array([feature_store.batter_index.get(name, -1) for name in lineup], dtype=np.intp)
+        unknown = batter_rows < 0
+        
+        features = np.empty((len(lineup), len(FEATURE_NAMES)))
+        if not unknown.all():
+            features[~unknown] = feature_store.rows(batter_rows[~unknown], team, venue)
+        if unknown.any():
+            if batting_team is not None:
+                fill_average = team_batting_strengths[batting_team]
+            else:
+                fill_average = float(np.mean(list(team_batting_strengths.values())))
+            features[unknown] = feature_store.fill_in_rows(fill_average, team, venue, int(unknown.sum()))
+        
+        predictions = active_model.predict(features)
         
-        # Return results
         return jsonify({
-            "batter": batter_name,
-            "opponent_team": opponent_team,
-            "venue": venue_name,
-            "predicted_runs": float(prediction[0]),
-            "features_used": {
-                "average_runs": float(batter["average_runs"]),
-                "average_strike_rate": float(batter["average_strike_rate"]),
-                "total_balls_faced": int(batter["total_balls_faced"]),
-                "total_dismissals": int(batter["total_dismissals"]),
-                "opponent_strength": float(opponent_strength),
-                "venue_difficulty": float(venue_difficulty),
-                "batter_opponent_interaction": float(batter_opponent_interaction),
-                "batter_venue_interaction": float(batter_venue_interaction),
-                "average_runs_vs_team": float(average_runs_vs_team),
-                "average_runs_vs_venue": float(average_runs_vs_venue)
-            }
+            "opponent_team": feature_store.teams[team],
+            "venue": feature_store.venues[venue],
+            "batting_team": batting_team,
+            "model_version": active_model.version,
+            "batters": [
+                {"batter": name, "predicted_runs": float(prediction), "estimated": bool(estimated)}
+                for name, prediction, estimated in zip(lineup, predictions, unknown)
+            ],
+            "team_total": float(predictions.sum())
         })
 
     except Exception as e:
         import traceback
-        print(f"Error in prediction: {str(e)}")
+        print(f"Error in lineup prediction: {str(e)}")
         print(traceback.format_exc())
-        return jsonify({"error": f"An error occurred during prediction: {str(e)}"}), 500
+        return jsonify({"error": f"An error occurred during lineup prediction: {str(e)}"}), 500
+
+@app.route("/batters/<path:batter_name>/heatmap", methods=["GET"])
+def batter_heatmap(batter_name):
+    """Predicted runs for one batter against every team at every venue.
+
+    Read straight from the prediction cube when it is enabled and current, otherwise
+    scored with one model call over the teams x venues grid.
+    """
+    active_model = model_registry.current()
+    if active_model is None:
+        return jsonify({"error": "Model not loaded. Please check server logs."}), 503
+    batter = feature_store.batter_index.get(batter_name)
+    if batter is None:
+        return jsonify({"error": f"Batter {batter_name} not found in database"}), 404
+    
+    teams, venues = len(feature_store.teams), len(feature_store.venues)
+    cube = current_cube(active_model)
+    if cube is not None:
+        grid, source = cube.values[batter], "cube"
+    else:
+        features = feature_store.rows(batter, np.repeat(np.arange(teams), venues), np.tile(np.arange(venues), teams))
+        grid, source = np.asarray(active_model.predict(features)).reshape(teams, venues), "model"
+    
+    return jsonify({
+        "batter": batter_name,
+        "model_version": active_model.version,
+        "source": source,
+        "teams": feature_store.teams,
+        "venues": feature_store.venues,
+        "predicted_runs": np.asarray(grid, dtype=np.float64).tolist()
+    })
+
+@app.route("/rankings", methods=["GET"])
+def rankings():
+    """Top-K batters projected to score most against an opponent at a venue.
+
+    Scores the whole roster in one vectorized pass and picks the top K with
+    argpartition. Optional filters: min_balls_faced (batters whose balls faced is
+    only an estimate, like the CSV roster's, never pass a positive threshold), and
+    exclude_opponent_players (batters known to play for the opponent).
+    """
+    active_model = model_registry.current()
+    if active_model is None:
+        return jsonify({"error": "Model not loaded. Please check server logs."}), 503
+    
+    opponent_team = request.args.get("opponent_team", "")
+    venue_name = request.args.get("venue_name", "")
+    k = min(max(request.args.get("k", 10, type=int), 1), MAX_RANKING_SIZE)
+    min_balls_faced = request.args.get("min_balls_faced", 0, type=float)
+    exclude_opponent_players = request.args.get("exclude_opponent_players", "true").lower() in ("1", "true", "yes")
+    
+    team = feature_store.team_index.get(opponent_team)
+    if team is None:
+        return jsonify({"error": f"Team {opponent_team} not found in database"}), 400
+    venue = feature_store.venue_index.get(venue_name)
+    if venue is None:
+        return jsonify({"error": f"Venue {venue_name} not found in database"}), 400
+    
+    try:
+        roster = np.arange(len(feature_store.batter_names))
+        features = feature_store.rows(roster, team, venue)
+        cube = current_cube(active_model)
+        if cube is not None:
+            predictions = np.asarray(cube.values[:, team, venue])
+        else:
+            predictions = np.asarray(active_model.predict(features))
+        
+        balls_known = ~feature_store.stats_imputed[:, 2]
+        mask = features[:, 2] >= min_balls_faced
+        if min_balls_faced > 0:
+            mask &= balls_known
+        if exclude_opponent_players:
+            mask &= ~feature_store.team_member[:, team]
+        candidates = np.flatnonzero(mask)
+        
+        # Partial selection of the best K, then sort only those K
+        if len(candidates) > k:
+            candidates = candidates[np.argpartition(-predictions[candidates], k - 1)[:k]]
+        top = candidates[np.argsort(-predictions[candidates], kind="stable")]
+        
+        return jsonify({
+            "opponent_team": feature_store.teams[team],
+            "venue": feature_store.venues[venue],
+            "k": k,
+            "model_version": active_model.version,
+            "eligible": int(mask.sum()),
+            "results": [
+                {
+                    "rank": rank,
+                    "batter": feature_store.batter_names[i],
+                    "predicted_runs": float(predictions[i]),
+                    "total_balls_faced": int(features[i, 2]) if balls_known[i] else None
+                }
+                for rank, i in enumerate(top, start=1)
+            ]
+        })
+
+    except Exception as e:
+        import traceback
+        print(f"Error in rankings: {str(e)}")
+        print(traceback.format_exc())
+        return jsonify({"error": f"An error occurred while ranking batters: {str(e)}"}), 500
+
+@app.route("/predict/stream", methods=["POST"])
+def predict_stream():
+    """Score newline-delimited JSON matchups as they arrive and stream the results back.
+
+    Lines are read straight from the request body and scored in chunks of
+    STREAM_CHUNK_SIZE, so memory use stays flat however long the upload is. Results
+    are NDJSON by default; with MessagePack each chunk is one map of columns, with
+    Arrow one record batch of an IPC stream.
+    """
+    active_model = model_registry.current()
+    if active_model is None:
+        return jsonify({"error": "Model not loaded. Please check server logs."}), 503
+    try:
+        media_type = negotiate_format(NDJSON)
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    
+    stream = request.stream
+    compact = wants_compact()
+    arrow_stream = ArrowStreamEncoder() if media_type == ARROW else None
+    
+    def encode(results):
+        if arrow_stream is not None:
+            return arrow_stream.write(results)
+        if media_type == MSGPACK:
+            return msgpack.packb({"columns": result_columns(results)}, use_bin_type=True)
+        if compact:
+            results = [compact_result(result) for result in results]
+        return b"".join(dumps_json(result) + b"\n" for result in results)
+    
+    def score_chunk(chunk, start_index):
+        try:
+            results = score_matchups([item for item, _ in chunk], active_model, start_index)
+        except Exception as e:
+            # Fail this chunk's lines only and keep scoring the rest of the stream
+            import traceback
+            print(f"Error in streaming prediction: {str(e)}")
+            print(traceback.format_exc())
+            results = [
+                {"index": start_index + i, "error": f"An error occurred during streaming prediction: {str(e)}"}
+                for i in range(len(chunk))
+            ]
+        for i, (_, parse_error) in enumerate(chunk):
+            if parse_error:
+                results[i] = {"index": results[i]["index"], "error": parse_error}
+        return encode(results)
+    
+    def generate():
+        chunk = []
+        start_index = 0
+        try:
+            for line in stream:
+                line = line.strip()
+                if not line:
+                    continue
+                try:
+                    chunk.append((json.loads(line), None))
+                except ValueError:
+                    chunk.append((None, "Invalid JSON"))
+                if len(chunk) >= STREAM_CHUNK_SIZE:
+                    yield score_chunk(chunk, start_index)
+                    start_index += len(chunk)
+                    chunk = []
+            if chunk:
+                yield score_chunk(chunk, start_index)
+        except Exception as e:
+            import traceback
+            print(f"Error in streaming prediction: {str(e)}")
+            print(traceback.format_exc())
+            yield encode([{"error": f"An error occurred during streaming prediction: {str(e)}"}])
+        if arrow_stream is not None:
+            yield arrow_stream.close()
+    
+    response = Response(stream_with_context(generate()), mimetype=media_type)
+    response.vary.add("Accept")
+    return response
+
+@app.route("/metrics", methods=["GET"])
+def metrics_endpoint():
+    """Prometheus scrape endpoint"""
+    worker = {"pid": str(os.getpid())}
+    cache = prediction_cache.stats()
+    gauges = [
+        ("prediction_cache_entries", worker, cache["size"]),
+        ("prediction_cache_hits", worker, cache["hits"]),
+        ("prediction_cache_misses", worker, cache["misses"]),
+        ("prediction_cache_evictions", worker, cache["evictions"])
+    ]
+    for kind, value in memory_usage().items():
+        gauges.append(("process_resident_memory_bytes", dict(worker, kind=kind), value))
+    gauges.append(("admission_in_flight", worker, admission.in_flight))
+    if micro_batcher is not None:
+        batching = micro_batcher.stats()
+        gauges.append(("micro_batches", worker, batching["batches"]))
+        gauges.append(("micro_batch_rows", worker, batching["rows"]))
+    return Response(metrics.render(gauges), mimetype="text/plain; version=0.0.4")
+
+@app.route("/healthz", methods=["GET"])
+def healthz():
+    """Liveness: the process is up and serving requests"""
+    return jsonify({"status": "ok"})
+
+@app.route("/readyz", methods=["GET"])
+def readyz():
+    """Readiness: the model and feature store are loaded (starts the warm-up if needed)"""
+    if not is_ready():
+        start_warm_up()
+    ready = is_ready()
+    active_model = model_registry.current()
+    return jsonify({
+        "ready": ready,
+        "model_loaded": active_model is not None,
+        "model_version": active_model.version if active_model else None,
+        "feature_store_loaded": feature_store is not None,
+        "last_error": model_registry.last_error,
+        "startup_timings_ms": startup_timings,
+        "shared_tables": SHARED_TABLES,
+        "prediction_cube": prediction_cubes.cube.path if prediction_cubes and prediction_cubes.cube else None,
+        "memory_bytes": memory_usage()
+    }), 200 if ready else 503
+
+@app.route("/cache/stats", methods=["GET"])
+def cache_stats():
+    """Hit/miss/eviction counters for the prediction cache"""
+    return jsonify(prediction_cache.stats())
+
+@app.route("/admin/model", methods=["GET"])
+def model_info():
+    """Describe the active model and the outcome of the last reload"""
+    denied = require_admin()
+    if denied:
+        return denied
+    active_model = model_registry.current()
+    return jsonify({
+        "model": active_model.describe() if active_model else None,
+        "reloads": model_registry.reloads,
+        "last_error": model_registry.last_error
+    })
+
+@app.route("/admin/profiles", methods=["GET"])
+def list_profiles():
+    """Recent request profiles (newest first) with their stage timings"""
+    error = require_admin()
+    if error:
+        return error
+    if request_profiler is None:
+        return jsonify({"enabled": False, "profiles": []})
+    try:
+        limit = min(max(int(request.args.get("limit", 20)), 1), request_profiler.keep)
+    except ValueError:
+        return jsonify({"error": "limit must be an integer"}), 400
+    return jsonify({
+        "enabled": True,
+        "directory": request_profiler.directory,
+        "profiles": request_profiler.recent(limit)
+    })
+
+@app.route("/admin/profiles/<name>.<kind>", methods=["GET"])
+def download_profile(name, kind):
+    """One profile's cProfile stats (prof), collapsed stacks (collapsed) or summary (json)"""
+    error = require_admin()
+    if error:
+        return error
+    if request_profiler is None or kind not in ("prof", "collapsed", "json"):
+        return jsonify({"error": "Profile not found"}), 404
+    return send_from_directory(request_profiler.directory, f"{name}.{kind}", as_attachment=kind == "prof")
+
+@app.route("/admin/reload-model", methods=["POST"])
+def reload_model():
+    """Load a model artifact in the background and swap it in once it passes the canary check.
+
+    This worker reloads at once; once the artifact has loaded and passed the canary
+    it is recorded next to the model, so every other worker's watcher
+    (MODEL_WATCH_INTERVAL) loads the same one. A failed reload records nothing.
+    """
+    denied = require_admin()
+    if denied:
+        return denied
+    
+    data = request.get_json(silent=True) or {}
+    path = data.get("path")
+    if path:
+        # Only artifacts next to the configured model may be loaded
+        model_dir = os.path.dirname(os.path.abspath(model_filename))
+        path = os.path.abspath(os.path.join(model_dir, path))
+        if os.path.dirname(path) != model_dir:
+            return jsonify({"error": "Model path must be in the model directory"}), 400
+    
+    path = os.path.abspath(path or model_registry.default_path)
+    if not model_registry.reload_async(path, publish=True):
+        return jsonify({"error": "A model reload is already in progress"}), 409
+    return jsonify({
+        "status": "reloading",
+        "path": path,
+        "other_workers": f"within {MODEL_WATCH_INTERVAL:g}s" if MODEL_WATCH_INTERVAL > 0 else "not watching"
+    }), 202
+
+@app.route("/admin/batters/<path:batter_name>", methods=["PUT"])
+def update_batter(batter_name):
+    """Add or update a batter profile and incrementally refresh team strengths.
+
+    Applies to the worker that handles the request only (its pid is in the
+    response); with several gunicorn workers send it to each of them, or run one.
+    """
+    denied = require_admin()
+    if denied:
+        return denied
+    
+    data = request.get_json(silent=True)
+    if not isinstance(data, dict):
+        return jsonify({"error": "Expected a batter profile object"}), 400
+    try:
+        changed_teams = upsert_batter_profile(batter_name, data)
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    
+    return jsonify({
+        "batter": feature_store.canonical_batter(batter_name) or batter_name,
+        "changed_teams": changed_teams,
+        "worker_pid": os.getpid(),
+        "team_bowling_strengths": team_bowling_strengths,
+        "team_batting_strengths": team_batting_strengths
+    })
 
 if __name__ == "__main__":
     port = int(os.environ.get("PORT", 5000))
-    app.run(host="0.0.0.0", port=port, debug=True)
+    warm_up()
+    # The debugger and reloader are for local development only; FLASK_DEBUG=1 turns them on
+    app.run(host="0.0.0.0", port=port, debug=os.environ.get("FLASK_DEBUG", "0") == "1", threaded=True)
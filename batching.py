@@ -0,0 +1,102 @@
+# batching.py
+import os
+import queue
+import threading
+import time
+import numpy as np
+
+
+class PendingPrediction:
+    """One caller's row waiting for the dispatcher"""
+
+    __slots__ = ("row", "done", "value", "version", "error")
+
+    def __init__(self, row):
+        self.row = row
+        self.done = threading.Event()
+        self.value = None
+        self.version = None
+        self.error = None
+
+
+class MicroBatcher:
+    """Coalesces concurrent single-row predictions into stacked model.predict calls.
+
+    Callers hand in one feature row and block; a dispatcher thread collects rows
+    until it has max_batch_size of them or max_wait seconds have passed since the
+    first one arrived, scores them as one matrix and wakes each caller with its own
+    value. Only useful with a threaded server (e.g. gunicorn --worker-class gthread).
+    """
+
+    def __init__(self, get_model, max_batch_size=64, max_wait=0.002, timeout=5.0):
+        self.get_model = get_model  # returns the active ModelArtifact
+        self.max_batch_size = max_batch_size
+        self.max_wait = max_wait
+        self.timeout = timeout
+        self.batches = 0
+        self.rows = 0
+        self._queue = queue.Queue()
+        self._dispatcher = None
+        self._dispatcher_pid = None
+        self._start_lock = threading.Lock()
+
+    def predict(self, row):
+        """Score one feature row; returns (prediction, model version)"""
+        self._ensure_dispatcher()
+        pending = PendingPrediction(row)
+        self._queue.put(pending)
+        if not pending.done.wait(self.timeout):
+            raise TimeoutError("Timed out waiting for a micro-batch")
+        if pending.error is not None:
+            raise pending.error
+        return pending.value, pending.version
+
+    def _ensure_dispatcher(self):
+        # Threads don't survive fork, so each gunicorn worker starts its own dispatcher
+        if self._dispatcher_pid == os.getpid() and self._dispatcher.is_alive():
+            return
+        with self._start_lock:
+            if self._dispatcher_pid != os.getpid() or not self._dispatcher.is_alive():
+                if self._dispatcher_pid != os.getpid():
+                    self._queue = queue.Queue()
+                self._dispatcher = threading.Thread(target=self._run, name="micro-batcher", daemon=True)
+                self._dispatcher.start()
+                self._dispatcher_pid = os.getpid()
+
+    def _run(self):
+        while True:
+            batch = [self._queue.get()]
+            deadline = time.perf_counter() + self.max_wait
+            while len(batch) < self.max_batch_size:
+                remaining = deadline - time.perf_counter()
+                if remaining <= 0:
+                    break
+                try:
+                    batch.append(self._queue.get(timeout=remaining))
+                except queue.Empty:
+                    break
+            self._flush(batch)
+
+    def _flush(self, batch):
+        try:
+            artifact = self.get_model()
+            if artifact is None:
+                raise RuntimeError("Model not loaded")
+            predictions = artifact.predict(np.vstack([pending.row for pending in batch]))
+            for pending, value in zip(batch, predictions):
+                pending.value = value
+                pending.version = artifact.version
+        except Exception as e:
+            for pending in batch:
+                pending.error = e
+        self.batches += 1
+        self.rows += len(batch)
+        for pending in batch:
+            pending.done.set()
+
+    def stats(self):
+        return {
+            "batches": self.batches,
+            "rows": self.rows,
+            "mean_batch_size": self.rows / self.batches if self.batches else 0.0
+        }
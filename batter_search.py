@@ -0,0 +1,67 @@
+# batter_search.py
+import bisect
+import hashlib
+import re
+import unicodedata
+
+_SEPARATORS = re.compile(r"[^\w]+")
+
+
+def normalize(text):
+    """Case- and accent-insensitive form of a name: 'Faf du Plessis' -> 'faf du plessis'"""
+    decomposed = unicodedata.normalize("NFKD", text)
+    stripped = "".join(ch for ch in decomposed if not unicodedata.combining(ch))
+    return " ".join(_SEPARATORS.sub(" ", stripped.casefold()).split())
+
+
+class BatterIndex:
+    """Prefix and token index over batter names, built once and queried with bisect.
+
+    Results are ranked by how well they match (exact name, then name prefix, then
+    every query word prefixing a word of the name) and then by `weights`, so the
+    more prolific batters come first among equally good matches.
+    """
+
+    def __init__(self, names, weights=None, fingerprint=None):
+        self.names = list(names)
+        self.weights = list(weights) if weights is not None else [0.0] * len(self.names)
+        self.normalized = [normalize(name) for name in self.names]
+        self.name_tokens = [normalized.split() for normalized in self.normalized]
+
+        # Sorted (key, batter id) pairs for whole names and for every word in a name
+        self.full = sorted((normalized, i) for i, normalized in enumerate(self.normalized))
+        self.tokens = sorted(
+            (token, i) for i, tokens in enumerate(self.name_tokens) for token in set(tokens)
+        )
+        # Identifies the data the index was built from (used in ETags)
+        self.fingerprint = fingerprint or hashlib.sha1("\x1f".join(self.names).encode("utf-8")).hexdigest()[:16]
+
+        # Default listing for an empty query is alphabetical
+        self.default_order = [i for _, i in self.full]
+
+    @staticmethod
+    def _prefix_range(pairs, prefix):
+        start = bisect.bisect_left(pairs, (prefix,))
+        end = bisect.bisect_left(pairs, (prefix + "\U0010ffff",))
+        return pairs[start:end]
+
+    def search(self, query):
+        """Return batter ids matching `query`, best match first"""
+        query = normalize(query)
+        if not query:
+            return self.default_order
+
+        query_tokens = query.split()
+        ranks = {}
+        for normalized, i in self._prefix_range(self.full, query):
+            ranks[i] = 0 if normalized == query else 1
+
+        # Candidates from the first query word, confirmed against the remaining words
+        for _, i in self._prefix_range(self.tokens, query_tokens[0]):
+            if i in ranks:
+                continue
+            tokens = self.name_tokens[i]
+            if all(any(token.startswith(word) for token in tokens) for word in query_tokens[1:]):
+                ranks[i] = 2
+
+        return sorted(ranks, key=lambda i: (ranks[i], -self.weights[i], self.normalized[i]))
@@ -0,0 +1,362 @@
+# bench.py
+"""Local benchmark and load-test suite for the prediction API.
+
+Replays a realistic matchup mix (a few popular batters take most of the traffic)
+against the app through Flask's test client and/or a local gunicorn instance at
+1..N concurrent clients, and times startup and the strength calculations. Each
+concurrency level gets its own draw and starts with an empty prediction cache.
+The memory mode compares per-worker RSS/PSS with private tables, with
+SHARED_TABLES=1, and with SHARED_TABLES=1 plus COMPILED_INFERENCE=1 (the only way
+the model's trees are shared and the sklearn estimator is dropped), each with and
+without preload. The encoding mode times each /predict/batch response format and
+its size. Results are written as JSON so runs can be compared from one commit to
+the next.
+
+    python bench.py --mode client gunicorn memory encoding --concurrency 1 2 4 8 -o bench_results.json
+"""
+import argparse
+import http.client
+import json
+import os
+import platform
+import socket
+import subprocess
+import sys
+import threading
+import time
+import numpy as np
+
+ROOT = os.path.dirname(os.path.abspath(__file__))
+
+
+def matchup_mix(app, count, seed=0):
+    """Draw `count` matchups with Zipf-like batter popularity and uniform teams/venues"""
+    rng = np.random.default_rng(seed)
+    names = app.feature_store.batter_names
+    weights = 1.0 / np.arange(1, len(names) + 1) ** 1.1
+    weights /= weights.sum()
+    batters = rng.choice(len(names), size=count, p=weights)
+    teams = rng.integers(len(app.ipl_teams), size=count)
+    venues = rng.integers(len(app.ipl_venues), size=count)
+    venue_names = list(app.ipl_venues)
+    return [
+        {"batter_name": names[b], "opponent_team": app.ipl_teams[t], "venue_name": venue_names[v]}
+        for b, t, v in zip(batters, teams, venues)
+    ]
+
+
+def summarize(latencies, elapsed):
+    latencies = np.asarray(latencies) * 1000.0
+    return {
+        "requests": int(latencies.size),
+        "rps": latencies.size / elapsed if elapsed else 0.0,
+        "p50_ms": float(np.percentile(latencies, 50)),
+        "p95_ms": float(np.percentile(latencies, 95)),
+        "p99_ms": float(np.percentile(latencies, 99)),
+        "max_ms": float(latencies.max())
+    }
+
+
+def run_clients(concurrency, payloads, send):
+    """Split payloads over `concurrency` threads calling send(client_id, payload); returns a summary"""
+    latencies = [[] for _ in range(concurrency)]
+    errors = [0] * concurrency
+
+    def worker(client_id):
+        for payload in payloads[client_id::concurrency]:
+            started = time.perf_counter()
+            ok = send(client_id, payload)
+            latencies[client_id].append(time.perf_counter() - started)
+            if not ok:
+                errors[client_id] += 1
+
+    threads = [threading.Thread(target=worker, args=(i,)) for i in range(concurrency)]
+    started = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - started
+
+    summary = summarize([value for values in latencies for value in values], elapsed)
+    summary["concurrency"] = concurrency
+    summary["errors"] = sum(errors)
+    return summary
+
+
+def bench_test_client(app, level_payloads, levels):
+    clients = {}
+
+    def send(client_id, payload):
+        client = clients.setdefault(client_id, app.app.test_client())
+        response = client.post("/predict", json=payload)
+        return response.status_code == 200 and "error" not in response.get_json()
+
+    results = []
+    for level, payloads in zip(levels, level_payloads):
+        # Every level starts cold, so its hit rate comes from its own traffic only
+        app.prediction_cache.clear()
+        results.append(run_clients(level, payloads, send))
+    return results
+
+
+def free_port():
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def start_gunicorn(workers, env):
+    """Start gunicorn with the shipped config and wait until /readyz passes; returns (process, port).
+
+    Threads, worker class and admission limits are left to gunicorn.conf.py (and the
+    environment), so every run measures the same server however many clients it has.
+    """
+    port = free_port()
+    command = [
+        sys.executable, "-m", "gunicorn", "app:app",
+        "--config", os.path.join(ROOT, "gunicorn.conf.py"),
+        "--bind", f"127.0.0.1:{port}",
+        "--workers", str(workers),
+        "--graceful-timeout", "5",
+        "--log-level", "warning"
+    ]
+    server = subprocess.Popen(command, cwd=ROOT, env=env)
+    deadline = time.time() + 60
+    while True:
+        try:
+            connection = http.client.HTTPConnection("127.0.0.1", port, timeout=1)
+            connection.request("GET", "/readyz")
+            response = connection.getresponse()
+            response.read()
+            connection.close()
+            if response.status == 200:
+                return server, port
+        except OSError:
+            pass
+        if server.poll() is not None or time.time() > deadline:
+            server.terminate()
+            raise RuntimeError("gunicorn did not start")
+        time.sleep(0.2)
+
+
+def bench_gunicorn(level_payloads, levels, workers, env):
+    """One fresh server per level, so no level is served from the previous level's cache"""
+    return [bench_gunicorn_level(payloads, level, workers, env) for level, payloads in zip(levels, level_payloads)]
+
+
+def bench_gunicorn_level(payloads, level, workers, env):
+    server, port = start_gunicorn(workers, env)
+    connections = {}
+    try:
+        bodies = [json.dumps(payload) for payload in payloads]
+        body_index = {id(payload): body for payload, body in zip(payloads, bodies)}
+
+        def send(client_id, payload):
+            connection = connections.get(client_id)
+            if connection is None:
+                connection = connections[client_id] = http.client.HTTPConnection("127.0.0.1", port, timeout=30)
+            connection.request("POST", "/predict", body=body_index[id(payload)],
+                               headers={"Content-Type": "application/json"})
+            response = connection.getresponse()
+            data = response.read()
+            return response.status == 200 and b'"error"' not in data
+
+        return run_clients(level, payloads, send)
+    finally:
+        for connection in connections.values():
+            connection.close()
+        server.terminate()
+        server.wait(timeout=30)
+
+
+def process_memory(pid):
+    """Rss and Pss (shared pages split between the processes mapping them) in MB, from /proc"""
+    usage = {}
+    with open(f"/proc/{pid}/smaps_rollup") as rollup:
+        for line in rollup:
+            name, _, value = line.partition(":")
+            if name in ("Rss", "Pss", "Shared_Clean", "Private_Dirty"):
+                usage[name.lower() + "_mb"] = int(value.split()[0]) / 1024
+    return usage
+
+
+def bench_memory(payloads, workers, env):
+    """Per-worker memory after some traffic, by what is shared between the workers.
+
+    SHARED_TABLES=1 alone only shares the feature tables; with the compiled engine the
+    model's trees go into the shared segment and each worker drops its sklearn estimator.
+    Every mode runs with and without preload (GUNICORN_PRELOAD).
+    """
+    results = {}
+    modes = (
+        ("private", {"SHARED_TABLES": "0", "COMPILED_INFERENCE": "0"}),
+        ("shared_tables", {"SHARED_TABLES": "1", "COMPILED_INFERENCE": "0"}),
+        ("shared_tables_compiled", {"SHARED_TABLES": "1", "COMPILED_INFERENCE": "1"})
+    )
+    runs = [
+        (f"{mode}/{'preload' if preload == '1' else 'no_preload'}", dict(settings, GUNICORN_PRELOAD=preload))
+        for preload in ("1", "0") for mode, settings in modes
+    ]
+    for mode, settings in runs:
+        server, port = start_gunicorn(workers, dict(env, **settings))
+        try:
+            for payload in payloads[:200]:
+                connection = http.client.HTTPConnection("127.0.0.1", port, timeout=30)
+                connection.request("POST", "/predict", body=json.dumps(payload),
+                                   headers={"Content-Type": "application/json"})
+                connection.getresponse().read()
+                connection.close()
+            with open(f"/proc/{server.pid}/task/{server.pid}/children") as children:
+                pids = [int(pid) for pid in children.read().split()]
+            per_worker = [process_memory(pid) for pid in pids]
+            results[mode] = {
+                "workers": per_worker,
+                "total_pss_mb": sum(worker["pss_mb"] for worker in per_worker)
+            }
+        finally:
+            server.terminate()
+            server.wait(timeout=30)
+    return results
+
+
+def bench_startup(runs, env):
+    """Wall time of a fresh interpreter importing app, and of importing plus warm_up()"""
+    results = {"runs": runs}
+    for name, code in (("import", "import app"), ("ready", "import app; app.warm_up()")):
+        timings = []
+        for _ in range(runs):
+            started = time.perf_counter()
+            subprocess.run([sys.executable, "-c", code], cwd=ROOT, env=env, check=True,
+                           stdout=subprocess.DEVNULL)
+            timings.append(time.perf_counter() - started)
+        results[name] = {"mean_s": float(np.mean(timings)), "min_s": float(np.min(timings))}
+    return results
+
+
+def bench_function(function, repeat=200):
+    timings = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        function()
+        timings.append(time.perf_counter() - started)
+    timings = np.asarray(timings) * 1e6
+    return {"repeat": repeat, "median_us": float(np.median(timings)), "min_us": float(timings.min())}
+
+
+def bench_encoding(app, payloads, repeat=20):
+    """Encode time and size of one /predict/batch result set in every available response format"""
+    from encoding import ARROW, MSGPACK, available_formats, compact_result, dumps_json, encode_results
+
+    active_model = app.model_registry.current()
+    results = app.score_matchups(payloads, active_model)
+    summary = {"model_version": active_model.version, "count": len(results), "errors": 0}
+    compact = [compact_result(result) for result in results]
+    encoders = {
+        "json (jsonify)": lambda: app.app.json.dumps(dict(summary, results=results)).encode("utf-8"),
+        "json (fast)": lambda: dumps_json(dict(summary, results=results)),
+        "json compact (fast)": lambda: dumps_json(dict(summary, results=compact))
+    }
+    if MSGPACK in available_formats():
+        encoders["msgpack"] = lambda: encode_results(results, MSGPACK, summary)
+    if ARROW in available_formats():
+        encoders["arrow"] = lambda: encode_results(results, ARROW, summary)
+
+    report = {}
+    for name, encode in encoders.items():
+        timings = []
+        for _ in range(repeat):
+            started = time.perf_counter()
+            body = encode()
+            timings.append(time.perf_counter() - started)
+        report[name] = {"rows": len(results), "bytes": len(body), "median_ms": float(np.median(timings) * 1000)}
+    return report
+
+
+def git_commit():
+    try:
+        return subprocess.run(["git", "rev-parse", "HEAD"], cwd=ROOT, capture_output=True,
+                              text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark the prediction API locally")
+    parser.add_argument("--mode", nargs="+", choices=["client", "gunicorn", "memory", "encoding"], default=["client"])
+    parser.add_argument("--concurrency", nargs="+", type=int, default=[1, 2, 4, 8])
+    parser.add_argument("--requests", type=int, default=2000, help="requests per concurrency level")
+    parser.add_argument("--gunicorn-workers", type=int, default=2)
+    parser.add_argument("--startup-runs", type=int, default=3)
+    parser.add_argument("--disable-cache", action="store_true", help="run with PREDICTION_CACHE_SIZE=0")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("-o", "--output", default="bench_results.json")
+    args = parser.parse_args(argv)
+
+    env = dict(os.environ)
+    if args.disable_cache:
+        env["PREDICTION_CACHE_SIZE"] = "0"
+        os.environ["PREDICTION_CACHE_SIZE"] = "0"
+
+    sys.path.insert(0, ROOT)
+    import app
+
+    if not app.warm_up():
+        print("No model loaded; set MODEL_PATH or add trained_model.pkl", file=sys.stderr)
+        return 1
+
+    # A fresh draw per concurrency level (seed, seed + 1, ...)
+    level_payloads = [matchup_mix(app, args.requests, args.seed + i) for i in range(len(args.concurrency))]
+    payloads = level_payloads[0]
+    indices = (
+        np.arange(len(app.feature_store.batter_names)),
+        np.zeros(len(app.feature_store.batter_names), dtype=np.intp),
+        np.zeros(len(app.feature_store.batter_names), dtype=np.intp)
+    )
+    results = {
+        "commit": git_commit(),
+        "timestamp": time.time(),
+        "python": platform.python_version(),
+        "model_version": app.model_registry.current().version,
+        "batters": len(app.feature_store.batter_names),
+        "cache_enabled": not args.disable_cache,
+        "startup": bench_startup(args.startup_runs, env),
+        "functions": {
+            "calculate_bowling_strengths": bench_function(app.calculate_bowling_strengths),
+            "calculate_batting_strengths": bench_function(app.calculate_batting_strengths),
+            "feature_store.row": bench_function(lambda: app.feature_store.row(0, 0, 0), repeat=2000),
+            "feature_store.rows(all batters)": bench_function(lambda: app.feature_store.rows(*indices))
+        },
+        "predict": {}
+    }
+
+    if "client" in args.mode:
+        results["predict"]["test_client"] = bench_test_client(app, level_payloads, args.concurrency)
+    if "gunicorn" in args.mode:
+        results["predict"]["gunicorn"] = bench_gunicorn(level_payloads, args.concurrency, args.gunicorn_workers, env)
+    if "memory" in args.mode:
+        results["memory"] = bench_memory(payloads, args.gunicorn_workers, env)
+    if "encoding" in args.mode:
+        results["encoding"] = bench_encoding(app, payloads)
+
+    with open(args.output, "w") as file:
+        json.dump(results, file, indent=2)
+
+    for mode, levels in results["predict"].items():
+        for level in levels:
+            print(f"{mode:12} c={level['concurrency']:<3} {level['rps']:8.0f} req/s  "
+                  f"p50 {level['p50_ms']:.2f} ms  p95 {level['p95_ms']:.2f} ms  p99 {level['p99_ms']:.2f} ms  "
+                  f"errors {level['errors']}")
+    for name, encoding in results.get("encoding", {}).items():
+        print(f"encode {name:20} {encoding['median_ms']:8.2f} ms  {encoding['bytes'] / 1024:8.1f} KiB "
+              f"for {encoding['rows']} rows")
+    for mode, memory in results.get("memory", {}).items():
+        rss = ", ".join(f"{worker['rss_mb']:.1f}" for worker in memory["workers"])
+        print(f"memory {mode:33} worker RSS {rss} MB  total PSS {memory['total_pss_mb']:.1f} MB")
+    print(f"startup {results['startup']['import']['mean_s']:.2f}s import, "
+          f"{results['startup']['ready']['mean_s']:.2f}s ready -> {args.output}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
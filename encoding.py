@@ -0,0 +1,133 @@
+# encoding.py
+import io
+import json
+import numpy as np
+
+# Optional encoders; each format is only offered when its package is installed (all three
+# are in requirements-optional.txt): format=msgpack needs msgpack, format=arrow needs
+# pyarrow, and format=json works everywhere but is faster with orjson
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+try:
+    import msgpack
+except ImportError:
+    msgpack = None
+
+try:
+    import pyarrow
+except ImportError:
+    pyarrow = None
+
+JSON = "application/json"
+NDJSON = "application/x-ndjson"
+MSGPACK = "application/msgpack"
+ARROW = "application/vnd.apache.arrow.stream"
+
+# Columns every columnar (MessagePack / Arrow) result set starts with
+RESULT_COLUMNS = ["index", "batter", "opponent_team", "venue", "predicted_runs", "error"]
+
+
+def available_formats():
+    """Media types this process can produce for result sets, JSON first"""
+    formats = [JSON]
+    if msgpack is not None:
+        formats.append(MSGPACK)
+    if pyarrow is not None:
+        formats.append(ARROW)
+    return formats
+
+
+def _default(value):
+    if isinstance(value, np.generic):
+        return value.item()
+    raise TypeError(f"Object of type {type(value).__name__} is not JSON serializable")
+
+
+def dumps_json(payload):
+    """Compact JSON bytes with sorted keys (like jsonify), through orjson when it is installed"""
+    if orjson is not None:
+        return orjson.dumps(payload, option=orjson.OPT_SORT_KEYS | orjson.OPT_SERIALIZE_NUMPY)
+    return json.dumps(payload, separators=(",", ":"), sort_keys=True, default=_default).encode("utf-8")
+
+
+def compact_result(result):
+    """Only what a bulk caller needs from one scored matchup"""
+    if "error" in result:
+        return {key: result[key] for key in ("index", "error") if key in result}
+    compact = {"predicted_runs": result["predicted_runs"]}
+    if "index" in result:
+        compact["index"] = result["index"]
+    if "prediction_interval" in result:
+        compact["prediction_interval"] = result["prediction_interval"]
+    return compact
+
+
+def result_columns(results):
+    """Column-oriented {name: list} for a list of result dicts; intervals become std/quantile columns"""
+    columns = {name: [] for name in RESULT_COLUMNS}
+    interval_columns = {}
+    for row, result in enumerate(results):
+        for name in RESULT_COLUMNS:
+            columns[name].append(result.get(name))
+        interval = result.get("prediction_interval")
+        if interval:
+            values = dict({"interval_std": interval["std"]},
+                          **{f"quantile_{q}": value for q, value in interval["quantiles"].items()})
+            for name, value in values.items():
+                interval_columns.setdefault(name, [None] * len(results))[row] = value
+    columns.update(interval_columns)
+    return columns
+
+
+def arrow_batch(columns):
+    types = {"index": pyarrow.int64(), "batter": pyarrow.string(), "opponent_team": pyarrow.string(),
+             "venue": pyarrow.string(), "error": pyarrow.string()}
+    return pyarrow.RecordBatch.from_pydict({
+        name: pyarrow.array(values, type=types.get(name, pyarrow.float64())) for name, values in columns.items()
+    })
+
+
+def encode_results(results, media_type, metadata=None):
+    """Encode a whole result set (e.g. /predict/batch) as one MessagePack map or Arrow IPC stream"""
+    columns = result_columns(results)
+    metadata = metadata or {}
+    if media_type == MSGPACK:
+        return msgpack.packb(dict(metadata, columns=columns), use_bin_type=True)
+    # Arrow schema metadata is string -> string, so the values are JSON-encoded
+    batch = arrow_batch(columns).replace_schema_metadata(
+        {key: json.dumps(value) for key, value in metadata.items()}
+    )
+    sink = io.BytesIO()
+    with pyarrow.ipc.new_stream(sink, batch.schema) as writer:
+        writer.write_batch(batch)
+    return sink.getvalue()
+
+
+class ArrowStreamEncoder:
+    """Incremental Arrow IPC stream: one record batch per chunk of results (all with the same columns)"""
+
+    def __init__(self):
+        self.sink = io.BytesIO()
+        self.writer = None
+
+    def _take(self):
+        data = self.sink.getvalue()
+        self.sink.seek(0)
+        self.sink.truncate()
+        return data
+
+    def write(self, results):
+        batch = arrow_batch(result_columns(results))
+        if self.writer is None:
+            self.writer = pyarrow.ipc.new_stream(self.sink, batch.schema)
+        self.writer.write_batch(batch)
+        return self._take()
+
+    def close(self):
+        # An empty upload still gets a valid stream: the schema and no rows
+        data = self.write([]) if self.writer is None else b""
+        self.writer.close()
+        return data + self._take()
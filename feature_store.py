@@ -0,0 +1,399 @@
+# feature_store.py
+import hashlib
+import json
+import os
+import numpy as np
+from identity import IdentityRegistry
+
+# Order of the columns the model was trained on
+FEATURE_NAMES = [
+    "average_runs",
+    "average_strike_rate",
+    "total_balls_faced",
+    "total_dismissals",
+    "opponent_strength",
+    "venue_difficulty",
+    "batter_opponent_interaction",
+    "batter_venue_interaction",
+    "average_runs_vs_team",
+    "average_runs_vs_venue"
+]
+
+# Per-batter columns held in FeatureStore.batter_stats
+BATTER_STATS = ["average_runs", "average_strike_rate", "total_balls_faced", "total_dismissals"]
+
+# Used when a batter has no recorded average against a team or at a venue
+DEFAULT_AVERAGE = 35.0
+
+# Per-batter tables of a FeatureStore (one row per batter), as built by profile_rows()
+ROW_ARRAYS = ["batter_stats", "team_averages", "venue_averages", "team_played", "team_member", "stats_imputed"]
+
+# Numeric tables of a FeatureStore, in the order they are shared between processes
+TABLE_ARRAYS = ["batter_stats", "team_averages", "venue_averages", "opponent_strength", "venue_difficulty"]
+
+# Bump whenever the layout of the binary CSV cache changes
+CSV_CACHE_VERSION = 1
+
+# Where the binary CSV cache is written
+CACHE_DIR = os.environ.get("FEATURE_CACHE_DIR", os.path.join(os.path.dirname(os.path.abspath(__file__)), ".cache"))
+
+# Prefix of the per-team columns in engineered_batter_stats.csv
+CSV_TEAM_PREFIX = "avg_runs_vs_"
+
+
+class CsvStats:
+    """Per-batter numeric columns read from one of the batter stats CSVs"""
+
+    def __init__(self, names, columns, values):
+        self.names = names
+        self.columns = columns
+        self.column_index = {column: i for i, column in enumerate(columns)}
+        self.values = values  # (batters, columns), memory-mapped when read from the cache
+
+    def column(self, name):
+        return self.values[:, self.column_index[name]]
+
+
+def file_sha256(path):
+    digest = hashlib.sha256()
+    with open(path, "rb") as file:
+        for block in iter(lambda: file.read(1 << 20), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def write_atomic(path, write):
+    """Write to a temporary file next to path and rename it into place"""
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    try:
+        with open(tmp_path, "wb") as file:
+            write(file)
+        os.replace(tmp_path, path)
+    finally:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+
+
+def load_csv_stats(csv_path, cache_dir=CACHE_DIR):
+    """Load a batter stats CSV, memory-mapping a binary cache of it when one is current.
+
+    The cache is keyed on the CSV's size and mtime; if those changed but the content
+    hash did not (e.g. after a fresh checkout) the cache is reused as-is.
+    """
+    stat = os.stat(csv_path)
+    base = os.path.join(cache_dir, os.path.splitext(os.path.basename(csv_path))[0])
+    meta_path = f"{base}.v{CSV_CACHE_VERSION}.json"
+    values_path = f"{base}.v{CSV_CACHE_VERSION}.npy"
+
+    meta = None
+    if os.path.exists(meta_path) and os.path.exists(values_path):
+        try:
+            with open(meta_path, "r") as file:
+                meta = json.load(file)
+        except (OSError, ValueError):
+            meta = None
+
+    if meta is not None and meta.get("version") == CSV_CACHE_VERSION:
+        fresh = meta["size"] == stat.st_size and meta["mtime_ns"] == stat.st_mtime_ns
+        if not fresh and meta["size"] == stat.st_size and meta["sha256"] == file_sha256(csv_path):
+            # Same content, new mtime: refresh the key so later starts skip the hash
+            meta["mtime_ns"] = stat.st_mtime_ns
+            write_atomic(meta_path, lambda file: file.write(json.dumps(meta).encode("utf-8")))
+            fresh = True
+        if fresh:
+            return CsvStats(meta["names"], meta["columns"], np.load(values_path, mmap_mode="r"))
+
+    # Cache miss: parse the text once with a columnar reader and write the cache
+    import pandas as pd
+
+    frame = pd.read_csv(csv_path)
+    names = frame.iloc[:, 0].astype(str).tolist()
+    columns = [str(column) for column in frame.columns[1:]]
+    values = np.ascontiguousarray(frame.iloc[:, 1:].to_numpy(dtype=np.float64))
+
+    try:
+        os.makedirs(cache_dir, exist_ok=True)
+        write_atomic(values_path, lambda file: np.save(file, values))
+        meta = {
+            "version": CSV_CACHE_VERSION,
+            "size": stat.st_size,
+            "mtime_ns": stat.st_mtime_ns,
+            "sha256": file_sha256(csv_path),
+            "names": names,
+            "columns": columns
+        }
+        write_atomic(meta_path, lambda file: file.write(json.dumps(meta).encode("utf-8")))
+    except OSError as e:
+        print(f"Warning: could not write feature cache for {csv_path}: {e}")
+
+    return CsvStats(names, columns, values)
+
+
+def profile_rows(profile, teams, venues):
+    """Flatten one batter profile dict into its row of each of ROW_ARRAYS.
+
+    The teams a batter plays (or played) for are the ones with 0.0 in team_averages
+    (the hand-coded convention); `imputed` optionally lists stats that are estimates.
+    """
+    team_averages = profile["team_averages"]
+    imputed = profile.get("imputed", ())
+    return {
+        "batter_stats": [profile[column] for column in BATTER_STATS],
+        "team_averages": [team_averages.get(team, DEFAULT_AVERAGE) for team in teams],
+        "venue_averages": [profile["venue_averages"].get(venue, DEFAULT_AVERAGE) for venue in venues],
+        "team_played": [team_averages.get(team, 0.0) > 0 for team in teams],
+        "team_member": [team_averages.get(team) == 0.0 for team in teams],
+        "stats_imputed": [column in imputed for column in BATTER_STATS]
+    }
+
+
+def merge_team_columns(csv_stats, teams, rows=slice(None)):
+    """Per-team averages from the CSV and whether any were recorded, both shape (rows, teams).
+
+    Every column whose name resolves to a team in the registry counts towards that
+    team, so historical franchise names (Kings XI Punjab, Delhi Daredevils, ...)
+    are merged into the current team as the mean of the non-zero averages. The CSV
+    writes 0.0 for teams a batter never faced, so those (and teams without any
+    column) get DEFAULT_AVERAGE; columns for defunct franchises are ignored.
+    """
+    values = np.asarray(csv_stats.values[rows], dtype=np.float64)
+    sums = np.zeros((values.shape[0], len(teams)))
+    counts = np.zeros((values.shape[0], len(teams)))
+    for j, column in enumerate(csv_stats.columns):
+        if column == "avg_runs_vs_team":
+            continue
+        if column.startswith(CSV_TEAM_PREFIX):
+            column = column[len(CSV_TEAM_PREFIX):]
+        team = teams.get(column)
+        if team is None:
+            continue
+        played = values[:, j] > 0
+        sums[:, team] += np.where(played, values[:, j], 0.0)
+        counts[:, team] += played
+
+    played = counts > 0
+    merged = np.divide(sums, counts, out=np.full_like(sums, DEFAULT_AVERAGE), where=played)
+    return merged, played
+
+
+class FeatureStore:
+    """Array-backed lookup tables that turn (batter, team, venue) indices into feature rows.
+
+    Built once from the profile dicts; every lookup afterwards is a fancy index into
+    dense matrices, so the cost does not depend on how many batters are loaded.
+    """
+
+    def __init__(self, batter_names, teams, venues, batter_stats, team_averages, venue_averages,
+                 opponent_strength, venue_difficulty, team_played=None, team_member=None, stats_imputed=None,
+                 batter_aliases=None):
+        self.batter_names = list(batter_names)
+
+        # Integer index maps for names, teams and venues; teams and venues also
+        # resolve their aliases (see identity.py), batters their scorecard names
+        self.batter_index = {name: i for i, name in enumerate(self.batter_names)}
+        self.batter_aliases = {}
+        for name, aliases in (batter_aliases or {}).items():
+            if name in self.batter_index:
+                for alias in aliases:
+                    self.batter_aliases.setdefault(alias, name)
+                    self.batter_index.setdefault(alias, self.batter_index[name])
+        self.team_index = teams if isinstance(teams, IdentityRegistry) else IdentityRegistry(teams)
+        self.venue_index = venues if isinstance(venues, IdentityRegistry) else IdentityRegistry(venues)
+        self.teams = self.team_index.names
+        self.venues = self.venue_index.names
+
+        self.batter_stats = np.asarray(batter_stats, dtype=np.float64)        # (batters, 4)
+        self.team_averages = np.asarray(team_averages, dtype=np.float64)      # (batters, teams)
+        self.venue_averages = np.asarray(venue_averages, dtype=np.float64)    # (batters, venues)
+        self.opponent_strength = np.asarray(opponent_strength, dtype=np.float64)  # (teams,)
+        self.venue_difficulty = np.asarray(venue_difficulty, dtype=np.float64)    # (venues,)
+        # Which team averages were recorded rather than filled in with DEFAULT_AVERAGE
+        if team_played is None:
+            team_played = np.ones(self.team_averages.shape, dtype=bool)
+        self.team_played = np.asarray(team_played, dtype=bool)                   # (batters, teams)
+        # Teams each batter is known to play for (never known for the CSV roster)
+        if team_member is None:
+            team_member = np.zeros(self.team_averages.shape, dtype=bool)
+        self.team_member = np.asarray(team_member, dtype=bool)                   # (batters, teams)
+        # Which batter_stats are estimates rather than the batter's own numbers
+        if stats_imputed is None:
+            stats_imputed = np.zeros(self.batter_stats.shape, dtype=bool)
+        self.stats_imputed = np.asarray(stats_imputed, dtype=bool)               # (batters, 4)
+
+        self.fingerprint = self.compute_fingerprint()
+
+    @classmethod
+    def from_profiles(cls, batter_profiles, teams, venues, venue_info, bowling_strengths, csv_stats=None,
+                      batter_aliases=None):
+        """Compile the nested batter_profiles dicts (and optionally the CSV roster) into dense matrices.
+
+        `teams` and `venues` are IdentityRegistry objects (or plain lists of names).
+        `batter_aliases` maps profile names to the scorecard names the CSV uses for
+        the same player (see identity.py).
+        """
+        if not isinstance(teams, IdentityRegistry):
+            teams = IdentityRegistry(teams)
+        if not isinstance(venues, IdentityRegistry):
+            venues = IdentityRegistry(venues)
+        names = list(batter_profiles)
+
+        rows = [profile_rows(batter_profiles[name], teams.names, venues.names) for name in names]
+        tables = {table: np.array([row[table] for row in rows]) for table in ROW_ARRAYS}
+        batter_stats = tables["batter_stats"]
+
+        if csv_stats is not None:
+            # Hand-coded profiles are more detailed, so they win over CSV rows for the same player
+            known = set(names)
+            for name in names:
+                known.update((batter_aliases or {}).get(name, []))
+            keep = np.array([name not in known for name in csv_stats.names], dtype=bool)
+            names += [name for name, kept in zip(csv_stats.names, keep) if kept]
+
+            csv_rows = np.empty((int(keep.sum()), len(BATTER_STATS)))
+            csv_rows[:, 0] = csv_stats.column("avg_total_runs")[keep]
+            csv_rows[:, 1] = csv_stats.column("avg_strike_rate")[keep]
+            # The CSV has no balls faced / dismissals columns, so use the typical profile's values
+            csv_rows[:, 2] = np.median(batter_stats[:, 2]) if len(batter_stats) else 0.0
+            csv_rows[:, 3] = np.median(batter_stats[:, 3]) if len(batter_stats) else 0.0
+
+            csv_team_averages, csv_team_played = merge_team_columns(csv_stats, teams, keep)
+            # Only an overall stadium average is recorded (0.0 if none), so it applies to every venue
+            stadium = np.asarray(csv_stats.column("avg_runs_at_stadium")[keep], dtype=np.float64)
+            stadium = np.where(stadium > 0, stadium, DEFAULT_AVERAGE)
+            csv_venue_averages = np.repeat(stadium[:, None], len(venues), axis=1)
+
+            csv_imputed = np.zeros(csv_rows.shape, dtype=bool)
+            csv_imputed[:, 2:4] = True
+            # Team membership isn't recorded in the CSVs
+            csv_tables = {
+                "batter_stats": csv_rows, "team_averages": csv_team_averages, "venue_averages": csv_venue_averages,
+                "team_played": csv_team_played, "team_member": np.zeros_like(csv_team_played), "stats_imputed": csv_imputed
+            }
+            tables = {name: np.concatenate([tables[name], csv_tables[name]]) for name in ROW_ARRAYS}
+
+        return cls(
+            names, teams, venues, tables["batter_stats"], tables["team_averages"], tables["venue_averages"],
+            [bowling_strengths[team] for team in teams.names],
+            [venue_info[venue]["venue_difficulty"] for venue in venues.names],
+            team_played=tables["team_played"], team_member=tables["team_member"],
+            stats_imputed=tables["stats_imputed"], batter_aliases=batter_aliases
+        )
+
+    def compute_fingerprint(self):
+        """Content hash of the tables, used to tell when derived data is stale"""
+        digest = hashlib.sha1()
+        for names in (self.batter_names, self.teams, self.venues):
+            digest.update("\x1f".join(names).encode("utf-8"))
+        for array in (self.batter_stats, self.team_averages, self.venue_averages, self.opponent_strength,
+                      self.venue_difficulty, self.team_played, self.team_member, self.stats_imputed):
+            digest.update(np.ascontiguousarray(array).tobytes())
+        return digest.hexdigest()[:16]
+
+    def rows(self, batters, teams, venues, out=None):
+        """Build an (N, 10) feature matrix for index arrays (scalars are broadcast)"""
+        batters, teams, venues = np.broadcast_arrays(
+            np.asarray(batters, dtype=np.intp),
+            np.asarray(teams, dtype=np.intp),
+            np.asarray(venues, dtype=np.intp)
+        )
+        batters, teams, venues = batters.ravel(), teams.ravel(), venues.ravel()
+        if out is None:
+            out = np.empty((batters.shape[0], len(FEATURE_NAMES)))
+
+        out[:, :4] = self.batter_stats[batters]
+        out[:, 4] = self.opponent_strength[teams]
+        out[:, 5] = self.venue_difficulty[venues]
+        np.multiply(out[:, 0], out[:, 4], out=out[:, 6])
+        np.multiply(out[:, 0], out[:, 5], out=out[:, 7])
+        out[:, 8] = self.team_averages[batters, teams]
+        out[:, 9] = self.venue_averages[batters, venues]
+        return out
+
+    def fill_in_rows(self, average_runs, team, venue, count=1):
+        """Feature rows for unknown batters known only by an expected average.
+
+        The average stands in for their overall, vs-team and at-venue averages; the
+        remaining stats take the roster's median values.
+        """
+        out = np.empty((count, len(FEATURE_NAMES)))
+        out[:, :4] = np.median(self.batter_stats, axis=0)
+        out[:, 0] = average_runs
+        out[:, 4] = self.opponent_strength[team]
+        out[:, 5] = self.venue_difficulty[venue]
+        out[:, 6] = out[:, 0] * out[:, 4]
+        out[:, 7] = out[:, 0] * out[:, 5]
+        out[:, 8] = average_runs
+        out[:, 9] = average_runs
+        return out
+
+    def row(self, batter, team, venue):
+        """Build a (1, 10) feature matrix for a single matchup"""
+        return self.rows(batter, team, venue)
+
+    def canonical_batter(self, name):
+        """The roster name for a batter name or scorecard alias, or None"""
+        return self.batter_aliases.get(name, name if name in self.batter_index else None)
+
+    def profile(self, name):
+        """Rebuild a batter profile dict from the stored rows.
+
+        Only recorded team averages are included: teams filled in with DEFAULT_AVERAGE
+        are left out rather than passed on as data (or as the 0.0 own-team marker,
+        which is only set for the batter's known teams). Estimated stats are listed
+        under "imputed".
+        """
+        i = self.batter_index[name]
+        profile = {column: float(value) for column, value in zip(BATTER_STATS, self.batter_stats[i])}
+        profile["team_averages"] = {
+            team: float(average)
+            for team, average, played in zip(self.teams, self.team_averages[i], self.team_played[i]) if played
+        }
+        for team in np.flatnonzero(self.team_member[i]):
+            profile["team_averages"][self.teams[team]] = 0.0
+        profile["venue_averages"] = dict(zip(self.venues, self.venue_averages[i].tolist()))
+        imputed = [column for column, estimated in zip(BATTER_STATS, self.stats_imputed[i]) if estimated]
+        if imputed:
+            profile["imputed"] = imputed
+        return profile
+
+    def table_arrays(self):
+        return {name: getattr(self, name) for name in TABLE_ARRAYS}
+
+    def use_arrays(self, arrays):
+        """Swap in equal copies of the tables, e.g. read-only views of a shared segment"""
+        for name in TABLE_ARRAYS:
+            if arrays[name].shape != getattr(self, name).shape:
+                raise ValueError(f"Shared {name} has shape {arrays[name].shape}, expected {getattr(self, name).shape}")
+        for name in TABLE_ARRAYS:
+            setattr(self, name, arrays[name])
+
+    def _make_writable(self):
+        # Shared tables are read-only; the first update gives this process a private copy
+        for name in TABLE_ARRAYS:
+            array = getattr(self, name)
+            if not array.flags.writeable:
+                setattr(self, name, np.array(array))
+
+    def upsert_batter(self, name, profile):
+        """Insert or replace one batter's rows in place; returns the batter's index"""
+        rows = profile_rows(profile, self.teams, self.venues)
+        self._make_writable()
+        i = self.batter_index.get(name)
+        if i is None:
+            # Grow the tables before publishing the index so readers never see a missing row
+            i = len(self.batter_names)
+            for table in ROW_ARRAYS:
+                setattr(self, table, np.concatenate([getattr(self, table), [rows[table]]]))
+            self.batter_names.append(name)
+            self.batter_index[name] = i
+        else:
+            for table in ROW_ARRAYS:
+                getattr(self, table)[i] = rows[table]
+        self.fingerprint = self.compute_fingerprint()
+        return i
+
+    def set_opponent_strengths(self, team_ids, strengths):
+        """Overwrite the bowling strength of the given team ids"""
+        self._make_writable()
+        self.opponent_strength[np.asarray(team_ids, dtype=np.intp)] = strengths
+        self.fingerprint = self.compute_fingerprint()
@@ -0,0 +1,59 @@
+# gunicorn.conf.py
+"""gunicorn settings for the prediction API: gunicorn -c gunicorn.conf.py app:app
+
+The app is imported and warmed up once in the master (model unpickled, feature
+store and team strengths built) before any worker is forked, so workers start
+ready and share those pages copy-on-write. Set GUNICORN_PRELOAD=0 to have each
+worker warm up on its own instead.
+"""
+import gc
+import glob
+import os
+
+bind = os.environ.get("GUNICORN_BIND", f"0.0.0.0:{os.environ.get('PORT', 5000)}")
+workers = int(os.environ.get("GUNICORN_WORKERS", 2))
+worker_class = os.environ.get("GUNICORN_WORKER_CLASS", "gthread")
+threads = int(os.environ.get("GUNICORN_THREADS", 8))
+preload_app = os.environ.get("GUNICORN_PRELOAD", "1") == "1"
+# Each worker holds its own model; the watcher keeps them all on the same version after a
+# file swap or /admin/reload-model (set before the app is imported, which reads it)
+os.environ.setdefault("MODEL_WATCH_INTERVAL", "5")
+# Workers write their metrics snapshots here so a /metrics scrape covers every worker
+os.environ.setdefault("METRICS_DIR", os.path.join(os.path.dirname(os.path.abspath(__file__)), ".cache", "metrics"))
+# The app's admission control only sees requests that already hold a thread. Half of each
+# worker's threads may score at once (MAX_IN_FLIGHT); the other half wait for a slot, and
+# are shed with a 503 after ADMISSION_QUEUE_MS, so overload is visible to the app
+os.environ.setdefault("MAX_IN_FLIGHT", str(max(1, threads // 2)))
+# Connections a worker accepts beyond its threads (idle keep-alives, and requests waiting
+# for a thread, which neither admission control nor deadlines can see) are capped
+worker_connections = int(os.environ.get("GUNICORN_WORKER_CONNECTIONS", 2 * threads))
+# Past that, connections wait in the kernel listen queue, also unseen by the app. Keep it
+# short; behind a proxy that sets X-Request-Start, deadlines also count that wait
+backlog = int(os.environ.get("GUNICORN_BACKLOG", 64))
+timeout = int(os.environ.get("GUNICORN_TIMEOUT", 30))
+
+
+def on_starting(server):
+    # Runs once in the master; snapshots left by a previous server would be added to this one's totals
+    for path in glob.glob(os.path.join(os.environ["METRICS_DIR"], "metrics_*.json*")):
+        os.remove(path)
+
+
+def when_ready(server):
+    # Runs in the master after the (preloaded) app is imported and before workers fork
+    if server.cfg.preload_app:
+        import app
+
+        app.warm_up()
+        # Keep the collector in the workers from writing to (and so copying) the shared objects
+        gc.freeze()
+
+
+def post_worker_init(worker):
+    # Without preload each worker warms up before it accepts requests; with it this is a no-op
+    import app
+
+    app.warm_up()
+    # Threads don't survive fork; start the watcher now so idle workers follow reloads too
+    if app.MODEL_WATCH_INTERVAL > 0:
+        app.model_registry.start_watcher(app.MODEL_WATCH_INTERVAL)
@@ -0,0 +1,110 @@
+# identity.py
+from batter_search import normalize
+
+# Every name a current franchise has appeared under, keyed by the API's short code.
+# Defunct franchises (Deccan Chargers, Gujarat Lions, Kochi Tuskers Kerala, Pune
+# Warriors, Rising Pune Supergiant(s)) are not the same teams and stay unmapped.
+TEAM_ALIASES = {
+    "CSK": ["Chennai Super Kings"],
+    "MI": ["Mumbai Indians"],
+    "RCB": ["Royal Challengers Bangalore", "Royal Challengers Bengaluru"],
+    "KKR": ["Kolkata Knight Riders"],
+    "DC": ["Delhi Capitals", "Delhi Daredevils"],
+    "SRH": ["Sunrisers Hyderabad"],
+    "PBKS": ["Punjab Kings", "Kings XI Punjab", "KXIP"],
+    "RR": ["Rajasthan Royals"],
+    "GT": ["Gujarat Titans"],
+    "LSG": ["Lucknow Super Giants"]
+}
+
+# Other names used for the venues in ipl_venues (sponsor renames, city suffixes, nicknames)
+VENUE_ALIASES = {
+    "MA Chidambaram Stadium": ["MA Chidambaram Stadium, Chepauk", "MA Chidambaram Stadium, Chepauk, Chennai", "Chepauk"],
+    "Wankhede Stadium": ["Wankhede Stadium, Mumbai", "Wankhede"],
+    "M Chinnaswamy Stadium": ["M.Chinnaswamy Stadium", "M Chinnaswamy Stadium, Bengaluru", "Chinnaswamy"],
+    "Eden Gardens": ["Eden Gardens, Kolkata"],
+    "Arun Jaitley Stadium": ["Arun Jaitley Stadium, Delhi", "Feroz Shah Kotla", "Kotla"],
+    "Rajiv Gandhi Stadium": [
+        "Rajiv Gandhi International Stadium", "Rajiv Gandhi International Stadium, Uppal", "Uppal"
+    ],
+    "Punjab Cricket Association Stadium": [
+        "Punjab Cricket Association IS Bindra Stadium", "Punjab Cricket Association IS Bindra Stadium, Mohali",
+        "Punjab Cricket Association Stadium, Mohali", "Mohali"
+    ],
+    "Sawai Mansingh Stadium": ["Sawai Mansingh Stadium, Jaipur"],
+    "Narendra Modi Stadium": ["Narendra Modi Stadium, Ahmedabad", "Sardar Patel Stadium, Motera", "Motera"],
+    "Ekana Cricket Stadium": [
+        "Bharat Ratna Shri Atal Bihari Vajpayee Ekana Cricket Stadium",
+        "Bharat Ratna Shri Atal Bihari Vajpayee Ekana Cricket Stadium, Lucknow", "Ekana"
+    ]
+}
+
+# Scorecard names the batter stats CSVs use for the players in the hand-coded profiles
+# (ipl_data.batter_profiles), so each player is only listed once
+BATTER_ALIASES = {
+    "Virat Kohli": ["V Kohli"],
+    "Rohit Sharma": ["RG Sharma"],
+    "Jos Buttler": ["JC Buttler"],
+    "Rishabh Pant": ["RR Pant"],
+    "Suryakumar Yadav": ["SA Yadav"],
+    "Sanju Samson": ["SV Samson"],
+    "Yashasvi Jaiswal": ["YBK Jaiswal"],
+    "Shreyas Iyer": ["SS Iyer"],
+    "David Warner": ["DA Warner"],
+    "Faf du Plessis": ["F du Plessis"],
+    "Ruturaj Gaikwad": ["RD Gaikwad"],
+    "Kane Williamson": ["KS Williamson"],
+    "Quinton de Kock": ["Q de Kock"],
+    "Nicholas Pooran": ["N Pooran"],
+    "Glenn Maxwell": ["GJ Maxwell"],
+    "Hardik Pandya": ["HH Pandya"],
+    "Ravindra Jadeja": ["RA Jadeja"],
+    "Andre Russell": ["AD Russell"],
+    "Devon Conway": ["DP Conway"],
+    "Rinku Singh": ["RK Singh"]
+}
+
+
+class IdentityRegistry:
+    """Dense integer IDs for a set of canonical names, with O(1) alias resolution.
+
+    get() first tries the name as given and then its case/accent/punctuation
+    normalized form, so "Kings XI Punjab", "kings xi punjab" and "PBKS" all resolve
+    to the same ID. It mirrors dict.get() so it can stand in for a name -> index map.
+    """
+
+    def __init__(self, names, aliases=None):
+        self.names = list(names)
+        self._ids = {}
+        for i, name in enumerate(self.names):
+            self._add(name, i)
+        for name, alias_names in (aliases or {}).items():
+            if name not in self._ids:
+                continue
+            for alias in alias_names:
+                self._add(alias, self._ids[name])
+
+    def _add(self, name, i):
+        for key in (name, normalize(name)):
+            existing = self._ids.setdefault(key, i)
+            if existing != i:
+                raise ValueError(f"{name} is already registered to {self.names[existing]}")
+
+    def get(self, name, default=None):
+        if not isinstance(name, str):
+            return default
+        i = self._ids.get(name)
+        if i is None:
+            i = self._ids.get(normalize(name), default)
+        return i
+
+    def __contains__(self, name):
+        return self.get(name) is not None
+
+    def __len__(self):
+        return len(self.names)
+
+    def canonical(self, name):
+        """Canonical name for any alias, or None"""
+        i = self.get(name)
+        return None if i is None else self.names[i]
@@ -0,0 +1,227 @@
+# inference.py
+import numpy as np
+
+# Quantiles returned when a request asks for intervals without listing any
+DEFAULT_QUANTILES = (0.05, 0.95)
+
+# Levels at which training residual quantiles are stored in artifact metadata
+RESIDUAL_LEVELS = tuple(round(0.01 * i, 2) for i in range(1, 100))
+
+# Largest batch walked with StackedTrees. It walks every tree to full depth for every
+# row, so past a few hundred rows sklearn's own per-tree walk is faster
+STACKED_MAX_ROWS = 256
+
+
+class StackedTrees:
+    """Every tree of an ensemble flattened into one set of node arrays.
+
+    All trees are walked for all rows at once: each step is a handful of numpy
+    gathers over a (trees, rows) matrix of node ids, repeated max-depth times, so
+    there is no Python loop over trees. Leaves point at themselves, which lets
+    shallow trees idle until the deepest one finishes.
+    """
+
+    def __init__(self, trees, feature_maps=None):
+        features, thresholds, lefts, rights, values, roots = [], [], [], [], [], []
+        offset = 0
+        depth = 0
+        for i, tree in enumerate(trees):
+            count = tree.node_count
+            nodes = np.arange(count)
+            leaf = tree.children_left == -1
+
+            feature = np.where(leaf, 0, tree.feature).astype(np.intp)
+            if feature_maps is not None:
+                feature = np.asarray(feature_maps[i], dtype=np.intp)[feature]
+            features.append(feature)
+            thresholds.append(np.where(leaf, np.inf, tree.threshold))
+            lefts.append(np.where(leaf, nodes, tree.children_left) + offset)
+            rights.append(np.where(leaf, nodes, tree.children_right) + offset)
+            values.append(tree.value[:, 0, 0])
+            roots.append(offset)
+            offset += count
+            depth = max(depth, tree.max_depth)
+
+        self.feature = np.concatenate(features)
+        self.threshold = np.concatenate(thresholds)
+        self.left = np.concatenate(lefts)
+        self.right = np.concatenate(rights)
+        self.value = np.concatenate(values).astype(np.float64)
+        self.roots = np.asarray(roots, dtype=np.intp)
+        self.depth = depth
+
+    def arrays(self):
+        return {name: getattr(self, name) for name in ("feature", "threshold", "left", "right", "value", "roots")}
+
+    def use_arrays(self, arrays):
+        for name, array in arrays.items():
+            setattr(self, name, array)
+
+    def predict_all(self, X):
+        """Per-tree predictions, shape (trees, rows)"""
+        # sklearn compares float32 inputs against the float64 thresholds
+        X = np.asarray(X, dtype=np.float32)
+        rows = np.arange(X.shape[0])
+        nodes = np.repeat(self.roots[:, None], X.shape[0], axis=1)
+        for _ in range(self.depth):
+            go_left = X[rows, self.feature[nodes]] <= self.threshold[nodes]
+            nodes = np.where(go_left, self.left[nodes], self.right[nodes])
+        return self.value[nodes]
+
+
+def averaging_tree_ensemble(model):
+    """StackedTrees for forests / bagged trees whose prediction is the mean of their trees, else None"""
+    estimators = getattr(model, "estimators_", None)
+    # Gradient boosting keeps an array of stages and AdaBoost takes a weighted median; neither averages
+    if not isinstance(estimators, list) or not estimators or hasattr(model, "estimator_weights_"):
+        return None
+    if not all(hasattr(estimator, "tree_") for estimator in estimators):
+        return None
+    feature_maps = getattr(model, "estimators_features_", None)
+    return StackedTrees([estimator.tree_ for estimator in estimators], feature_maps)
+
+
+class CompiledModel:
+    """A fitted regressor reduced to flat numpy arrays, evaluated without calling sklearn.
+
+    Covers linear models (one coefficient vector and an intercept), single decision
+    trees, averaging forests / bagged trees and gradient boosting, all using
+    StackedTrees for the trees. Use compile_model() to build one.
+    """
+
+    def __init__(self, kind, coef=None, intercept=0.0, trees=None, scale=1.0):
+        self.kind = kind
+        self.coef = coef
+        self.intercept = intercept
+        self.trees = trees
+        self.scale = scale  # per-tree weight: 1/trees for averages, the learning rate for boosting
+
+    def arrays(self):
+        if self.trees is None:
+            return {"coef": self.coef}
+        return {f"trees.{name}": array for name, array in self.trees.arrays().items()}
+
+    def use_arrays(self, arrays):
+        if self.trees is None:
+            self.coef = arrays["coef"]
+        else:
+            self.trees.use_arrays({name[len("trees."):]: array for name, array in arrays.items()})
+
+    def predict(self, X):
+        X = np.asarray(X)
+        if self.trees is None:
+            return np.asarray(X, dtype=np.float64) @ self.coef + self.intercept
+        per_tree = self.trees.predict_all(X)
+        if self.kind == "forest":
+            return per_tree.mean(axis=0)
+        return self.intercept + self.scale * per_tree.sum(axis=0)
+
+
+def compile_model(model):
+    """CompiledModel for the supported regressors, else None"""
+    module = type(model).__module__
+    if module.startswith("sklearn.linear_model") and hasattr(model, "coef_"):
+        coef = np.asarray(model.coef_, dtype=np.float64)
+        if coef.ndim == 2 and coef.shape[0] == 1:
+            coef = coef[0]
+        if coef.ndim != 1:
+            return None
+        return CompiledModel("linear", coef=coef.copy(), intercept=float(np.ravel(model.intercept_)[0]))
+
+    if hasattr(model, "tree_") and not hasattr(model, "estimators_"):
+        if model.tree_.n_outputs != 1:
+            return None
+        return CompiledModel("tree", trees=StackedTrees([model.tree_]))
+
+    stacked = averaging_tree_ensemble(model)
+    if stacked is not None:
+        return CompiledModel("forest", trees=stacked)
+
+    # Gradient boosting: init prediction + learning_rate * sum of the stage trees
+    estimators = getattr(model, "estimators_", None)
+    if module.startswith("sklearn.ensemble._gb") and isinstance(estimators, np.ndarray) and estimators.shape[1:] == (1,):
+        init = getattr(model, "init_", None)
+        if init == "zero":
+            intercept = 0.0
+        elif hasattr(init, "constant_"):
+            intercept = float(np.ravel(init.constant_)[0])
+        else:
+            return None
+        return CompiledModel("boosting", intercept=intercept, scale=float(model.learning_rate),
+                             trees=StackedTrees([estimator.tree_ for estimator in estimators[:, 0]]))
+    return None
+
+
+def verify_compiled(model, compiled, X, rtol=1e-9, atol=1e-9):
+    """Largest absolute difference from model.predict on X, and whether it is within tolerance"""
+    expected = np.asarray(model.predict(X), dtype=np.float64)
+    actual = compiled.predict(X)
+    if actual.shape != expected.shape:
+        return float("inf"), False
+    difference = float(np.max(np.abs(actual - expected))) if len(expected) else 0.0
+    return difference, bool(np.allclose(actual, expected, rtol=rtol, atol=atol))
+
+
+def sorted_quantiles(values, quantiles):
+    """np.quantile(values, quantiles, axis=0) for values already sorted along axis 0.
+
+    Same linear interpolation, without np.quantile's per-call setup, which costs more
+    than the tree walk itself when scoring a single row.
+    """
+    position = quantiles * (values.shape[0] - 1)
+    low = np.floor(position).astype(np.intp)
+    high = np.minimum(low + 1, values.shape[0] - 1)
+    weight = (position - low)[:, None]
+    return values[low] + (values[high] - values[low]) * weight
+
+
+def derived(artifact, key, build):
+    """Per-artifact cache for structures derived from the model"""
+    if key not in artifact.derived:
+        artifact.derived[key] = build(artifact.model)
+    return artifact.derived[key]
+
+
+def tree_predictions(artifact, X):
+    """Per-tree predictions (trees, rows) of an averaging tree ensemble, else None"""
+    stacked = derived(artifact, "stacked_trees", averaging_tree_ensemble)
+    if stacked is None:
+        return None
+    if len(X) <= STACKED_MAX_ROWS or artifact.model is None:
+        return stacked.predict_all(X)
+    X = np.asarray(X, dtype=np.float32)
+    feature_maps = getattr(artifact.model, "estimators_features_", None)
+    per_tree = np.empty((len(artifact.model.estimators_), X.shape[0]))
+    for i, estimator in enumerate(artifact.model.estimators_):
+        rows = X if feature_maps is None else np.ascontiguousarray(X[:, feature_maps[i]])
+        # Tree.predict is (rows, outputs) or (rows, outputs, classes) depending on the sklearn version
+        per_tree[i] = estimator.tree_.predict(rows).reshape(X.shape[0], -1)[:, 0]
+    return per_tree
+
+
+def predict_with_intervals(artifact, X, quantiles=DEFAULT_QUANTILES):
+    """Point predictions plus spread for every row of X.
+
+    For averaging tree ensembles the spread comes from the per-tree predictions,
+    computed in one pass (whose mean is also the point estimate, so the model is
+    only walked once): StackedTrees for up to STACKED_MAX_ROWS rows, sklearn's tree
+    walk above that. The spread costs about as much again as the point prediction,
+    less for large batches. Other models fall back to residual quantiles saved in
+    the artifact's metadata at training time. Returns (points, std, quantiles array
+    of shape (len(quantiles), rows), method).
+    """
+    quantiles = np.asarray(quantiles, dtype=np.float64)
+    per_tree = tree_predictions(artifact, X)
+    if per_tree is not None:
+        points = per_tree.mean(axis=0)
+        std = np.sqrt(np.square(per_tree - points).mean(axis=0))
+        per_tree.sort(axis=0)
+        return points, std, sorted_quantiles(per_tree, quantiles), "ensemble"
+
+    residuals = artifact.metadata.get("residual_quantiles")
+    if residuals is None:
+        raise ValueError("Prediction intervals are not available for this model")
+    points = np.asarray(artifact.predict(X), dtype=np.float64)
+    offsets = np.interp(quantiles, RESIDUAL_LEVELS, residuals)
+    std = np.full(points.shape, float(artifact.metadata.get("residual_std", np.nan)))
+    return points, std, points[None, :] + offsets[:, None], "residual"
@@ -0,0 +1,313 @@
+# model_registry.py
+import hashlib
+import os
+import pickle
+import threading
+import time
+import numpy as np
+from inference import STACKED_MAX_ROWS, compile_model, verify_compiled
+
+# Bump when the layout of the artifact bundle changes
+ARTIFACT_FORMAT_VERSION = 1
+
+
+class ModelArtifact:
+    """A loaded model together with the version and metadata it was saved with"""
+
+    def __init__(self, model, version, path, metadata=None):
+        self.model = model  # None once released (see release_model)
+        self.model_type = type(model).__name__
+        self.version = version
+        self.path = path
+        self.metadata = metadata or {}
+        self.loaded_at = time.time()
+        self.derived = {}  # structures built from the model on first use (see inference.py)
+        self.engine = None  # verified CompiledModel used instead of model.predict, if any
+        self.engine_max_rows = 0  # larger batches go to model.predict, which is faster on them
+
+    def predict(self, X):
+        if self.engine is not None and (self.model is None or len(X) <= self.engine_max_rows):
+            return self.engine.predict(X)
+        return self.model.predict(X)
+
+    def release_model(self):
+        """Drop the sklearn estimator and score every batch with the engine.
+
+        For when the engine's arrays are shared between workers: the estimator would
+        otherwise stay as a private copy in each of them. Large batches and their
+        intervals then take the slower stacked walk.
+        """
+        if self.engine is None:
+            raise ValueError("Only an artifact with a compiled engine can release its model")
+        self.model = None
+
+    def describe(self):
+        return {
+            "version": self.version,
+            "path": self.path,
+            "loaded_at": self.loaded_at,
+            "model_type": self.model_type,
+            "engine": self.engine.kind if self.engine else None,
+            "engine_max_rows": (self.engine_max_rows if self.model is not None else None) if self.engine else None,
+            "model_released": self.model is None,
+            "metadata": self.metadata
+        }
+
+
+class HashingReader:
+    """Read-only file wrapper that hashes every byte read through it"""
+
+    def __init__(self, file):
+        self.file = file
+        self.digest = hashlib.sha1()
+
+    def read(self, size=-1):
+        data = self.file.read(size)
+        self.digest.update(data)
+        return data
+
+    def readline(self, size=-1):
+        data = self.file.readline(size)
+        self.digest.update(data)
+        return data
+
+    def readinto(self, buffer):
+        count = self.file.readinto(buffer)
+        self.digest.update(memoryview(buffer)[:count])
+        return count
+
+    def hexdigest(self):
+        # Whatever the unpickler didn't read still belongs to the file's hash
+        for block in iter(lambda: self.read(1 << 20), b""):
+            pass
+        return self.digest.hexdigest()
+
+
+def file_digest(path):
+    digest = hashlib.sha1()
+    with open(path, "rb") as file:
+        for block in iter(lambda: file.read(1 << 20), b""):
+            digest.update(block)
+    return digest.hexdigest()[:12]
+
+
+def load_model_artifact(path):
+    """Load a model artifact.
+
+    `.joblib` files are read with joblib, anything else as a plain pickle; either may
+    hold a bare estimator or a {"model": ..., "metadata": {...}} bundle written by
+    save_model_artifact(). Neither format keeps sklearn tree ensembles off the heap
+    (their nodes are copied when unpickled); COMPILED_INFERENCE=1 with SHARED_TABLES=1
+    is what shares a forest's arrays between workers.
+    """
+    if path.endswith(".joblib"):
+        import joblib
+
+        loaded = joblib.load(path)
+        digest = file_digest(path)
+    else:
+        # Hash while unpickling rather than holding a second copy of the file in memory
+        with open(path, "rb") as file:
+            reader = HashingReader(file)
+            loaded = pickle.load(reader)
+            digest = reader.hexdigest()[:12]
+
+    if isinstance(loaded, dict) and "model" in loaded:
+        metadata = dict(loaded.get("metadata") or {})
+        return ModelArtifact(loaded["model"], metadata.get("version") or digest, path, metadata)
+    return ModelArtifact(loaded, digest, path)
+
+
+def save_model_artifact(model, path, metadata=None):
+    """Write a model bundle atomically, with joblib for `.joblib` paths and pickle otherwise"""
+    bundle = {
+        "model": model,
+        "metadata": dict(metadata or {}, format_version=ARTIFACT_FORMAT_VERSION)
+    }
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    try:
+        if path.endswith(".joblib"):
+            import joblib
+
+            joblib.dump(bundle, tmp_path)
+        else:
+            with open(tmp_path, "wb") as file:
+                pickle.dump(bundle, file, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(tmp_path, path)
+    finally:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+
+
+class ModelRegistry:
+    """Holds the active model and swaps in new ones without blocking requests.
+
+    Request handlers call current() once and use that artifact for the whole request;
+    a reload builds and validates the replacement off to the side and then replaces
+    the reference in a single assignment, so in-flight requests are never affected.
+
+    Every process keeps its own registry. A reload that succeeds with publish=True
+    records its artifact in a small file next to the configured model (request()),
+    and each process's watcher (start_watcher) loads whatever that file or the model
+    file points at, so all gunicorn workers converge on the same version. Only
+    artifacts that loaded and passed the canary are recorded, and a recorded one
+    that can no longer be loaded falls back to the configured model.
+    """
+
+    def __init__(self, path, canary=None):
+        self.path = path
+        self.default_path = path
+        self.request_path = f"{path}.requested"
+        self.canary = canary  # callable returning a feature matrix every model must score
+        self.compile_sample = None  # callable returning rows a compiled engine must match; None disables it
+        self.compile_max_rows = STACKED_MAX_ROWS  # largest batch scored by the compiled engine
+        self.on_activate = None  # callable run with each validated artifact just before it goes live
+        self.last_error = None
+        self.reloads = 0
+        self._active = None
+        self._reload_lock = threading.Lock()
+        self._watcher = None
+        self._watcher_pid = None
+        self._loaded = None  # (path, mtime) of the active artifact
+
+    def current(self):
+        return self._active
+
+    def validate(self, artifact):
+        if self.canary is None:
+            return
+        features = self.canary()
+        predictions = np.asarray(artifact.model.predict(features))
+        if predictions.shape != (features.shape[0],):
+            raise ValueError(f"Canary prediction has shape {predictions.shape}, expected ({features.shape[0]},)")
+        if not np.all(np.isfinite(predictions)):
+            raise ValueError("Canary prediction is not finite")
+
+    def compile(self, artifact):
+        """Attach a compiled engine to the artifact if one exists and matches model.predict"""
+        started = time.perf_counter()
+        compiled = compile_model(artifact.model)
+        if compiled is None:
+            print(f"No compiled engine for {type(artifact.model).__name__}; using model.predict")
+            return
+        difference, matches = verify_compiled(artifact.model, compiled, self.compile_sample())
+        if not matches:
+            print(f"Compiled {compiled.kind} engine differs from model.predict by up to {difference:g}; "
+                  f"using model.predict")
+            return
+        artifact.engine = compiled
+        artifact.engine_max_rows = self.compile_max_rows
+        if compiled.kind == "forest":
+            # Interval estimates walk the same trees (see inference.predict_with_intervals)
+            artifact.derived["stacked_trees"] = compiled.trees
+        print(f"Compiled {compiled.kind} engine enabled for batches of up to {self.compile_max_rows} rows "
+              f"(max difference {difference:g}, {(time.perf_counter() - started) * 1000:.1f} ms)")
+
+    def desired_path(self):
+        """The artifact every process should serve: the last request(), unless the configured file is newer"""
+        try:
+            with open(self.request_path) as file:
+                requested = file.read().strip()
+            if requested and os.stat(self.request_path).st_mtime_ns >= (self._mtime(self.default_path) or 0):
+                return requested
+        except OSError:
+            pass
+        return self.default_path
+
+    def request(self, path=None):
+        """Ask every process watching this registry's files to serve `path` (default: the configured model)"""
+        path = os.path.abspath(path or self.default_path)
+        tmp_path = f"{self.request_path}.{os.getpid()}.tmp"
+        with open(tmp_path, "w") as file:
+            file.write(path)
+        os.replace(tmp_path, self.request_path)
+        return path
+
+    def load(self, path=None, if_changed=False, publish=False):
+        """Load, validate and activate a model; returns the new artifact or None on failure.
+
+        Without a path the desired one is loaded, falling back to the configured model
+        if it fails. With if_changed, an artifact whose file is already the active one
+        is kept as is; with publish, a successful load is request()ed for every process.
+        """
+        with self._reload_lock:
+            if path is not None:
+                artifact = self._load(path, if_changed)
+                if artifact is not None and publish:
+                    try:
+                        self.request(path)
+                    except OSError as e:
+                        print(f"Could not record the reload for other processes: {e}")
+                return artifact
+            # Decided under the lock, so a reload published meanwhile is not undone
+            desired = self.desired_path()
+            artifact = self._load(desired, if_changed)
+            if artifact is None and desired != self.default_path:
+                print(f"Falling back to the configured model {self.default_path}")
+                artifact = self._load(self.default_path, if_changed)
+            return artifact
+
+    def _load(self, path, if_changed):
+        """Load, validate and activate one artifact (the caller holds the reload lock)"""
+        mtime = self._mtime(path)
+        if if_changed and (os.path.abspath(path), mtime) == self._loaded:
+            return self._active
+        try:
+            if not os.path.exists(path):
+                raise FileNotFoundError(f"Model file {path} not found")
+            started = time.perf_counter()
+            artifact = load_model_artifact(path)
+            self.validate(artifact)
+            if self.compile_sample is not None:
+                self.compile(artifact)
+            if self.on_activate is not None:
+                self.on_activate(artifact)
+        except Exception as e:
+            self.last_error = str(e)
+            print(f"Error loading model: {str(e)}")
+            return None
+
+        self._active = artifact
+        self.path = path
+        self._loaded = (os.path.abspath(path), mtime)
+        self.last_error = None
+        self.reloads += 1
+        print(f"Model {artifact.version} loaded successfully from {path} "
+              f"in {(time.perf_counter() - started) * 1000:.1f} ms")
+        return artifact
+
+    def reload_async(self, path=None, publish=False):
+        """Start a background reload; returns False if one is already running"""
+        if self._reload_lock.locked():
+            return False
+        threading.Thread(target=self.load, args=(path, False, publish), name="model-reload", daemon=True).start()
+        return True
+
+    def start_watcher(self, interval):
+        """Poll the requested and configured model files and load the desired one whenever it changes.
+
+        One watcher per process; an artifact that fails to load is not retried until
+        its file changes again.
+        """
+        if self._watcher_pid == os.getpid() and self._watcher.is_alive():
+            return
+
+        def watch():
+            attempted = self._loaded
+            while True:
+                time.sleep(interval)
+                path = self.desired_path()
+                seen = (os.path.abspath(path), self._mtime(path))
+                if seen[1] is not None and seen != self._loaded and seen != attempted:
+                    attempted = seen
+                    self.load(if_changed=True)
+
+        self._watcher = threading.Thread(target=watch, name="model-watcher", daemon=True)
+        self._watcher.start()
+        self._watcher_pid = os.getpid()
+
+    def _mtime(self, path):
+        try:
+            return os.stat(path).st_mtime_ns
+        except OSError:
+            return None
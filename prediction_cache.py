@@ -0,0 +1,65 @@
+# prediction_cache.py
+import threading
+from collections import OrderedDict
+
+
+class PredictionCache:
+    """Bounded in-process LRU cache of prediction responses.
+
+    Entries belong to a generation (model version + feature data fingerprint). Calling
+    set_generation() with a new value drops everything cached under the old one, so a
+    model reload or profile update can never serve a stale prediction.
+    """
+
+    def __init__(self, maxsize=100000):
+        self.maxsize = maxsize
+        self.generation = None
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def set_generation(self, generation):
+        if generation == self.generation:
+            return
+        with self._lock:
+            if generation != self.generation:
+                self._entries.clear()
+                self.generation = generation
+
+    def get(self, key):
+        with self._lock:
+            value = self._entries.get(key)
+            if value is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def put(self, key, value):
+        if self.maxsize <= 0:
+            return
+        with self._lock:
+            self._entries[key] = value
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "size": len(self._entries),
+                "maxsize": self.maxsize,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "hit_rate": self.hits / lookups if lookups else 0.0
+            }
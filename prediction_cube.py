@@ -0,0 +1,143 @@
+# prediction_cube.py
+import glob
+import hashlib
+import os
+import threading
+import time
+import numpy as np
+from feature_store import CACHE_DIR, write_atomic
+
+try:
+    import fcntl
+except ImportError:  # POSIX only; elsewhere concurrent builders just duplicate the work
+    fcntl = None
+
+CUBE_DIR = os.environ.get("PREDICTION_CUBE_DIR", CACHE_DIR)
+CUBE_PREFIX = "prediction-cube-"
+
+# Cubes left on disk after a new one is written
+CUBE_KEEP = 3
+
+# Rows scored per predict call while building, to bound memory on large rosters
+BUILD_CHUNK_ROWS = 100000
+
+# Seconds to wait after a failed build before trying the same model and store again
+RETRY_BACKOFF = float(os.environ.get("PREDICTION_CUBE_RETRY_BACKOFF", 60))
+
+
+def cube_key(model_version, fingerprint):
+    return hashlib.sha1(f"{model_version}:{fingerprint}".encode("utf-8")).hexdigest()[:16]
+
+
+def score_cube(store, predict):
+    """Predictions for every (batter, team, venue), shape (batters, teams, venues), float32"""
+    batters, teams, venues = len(store.batter_names), len(store.teams), len(store.venues)
+    cube = np.empty((batters, teams, venues), dtype=np.float32)
+    per_batter = teams * venues
+    step = max(1, BUILD_CHUNK_ROWS // max(per_batter, 1))
+    team_ids = np.repeat(np.arange(teams), venues)
+    venue_ids = np.tile(np.arange(venues), teams)
+    for start in range(0, batters, step):
+        batter_ids = np.arange(start, min(start + step, batters))
+        rows = store.rows(
+            np.repeat(batter_ids, per_batter), np.tile(team_ids, len(batter_ids)), np.tile(venue_ids, len(batter_ids))
+        )
+        cube[batter_ids] = np.asarray(predict(rows), dtype=np.float32).reshape(len(batter_ids), teams, venues)
+    return cube
+
+
+class PredictionCube:
+    """Every prediction for one model version and feature store fingerprint, memory-mapped from disk"""
+
+    def __init__(self, values, model_version, fingerprint, path=None):
+        self.values = values  # (batters, teams, venues) float32
+        self.model_version = model_version
+        self.fingerprint = fingerprint
+        self.path = path
+
+    def matches(self, model_version, fingerprint):
+        return self.model_version == model_version and self.fingerprint == fingerprint
+
+    def lookup(self, batter, team, venue):
+        return float(self.values[batter, team, venue])
+
+
+def load_or_build_cube(store, artifact, directory=CUBE_DIR):
+    """Map the cube for this model and store, scoring and writing it first if no worker has yet"""
+    fingerprint = store.fingerprint
+    key = cube_key(artifact.version, fingerprint)
+    path = os.path.join(directory, f"{CUBE_PREFIX}{key}.npy")
+    os.makedirs(directory, exist_ok=True)
+
+    lock = open(f"{path}.lock", "w")
+    try:
+        if fcntl is not None:
+            fcntl.flock(lock, fcntl.LOCK_EX)
+        if not os.path.exists(path):
+            values = score_cube(store, artifact.predict)
+            write_atomic(path, lambda file: np.save(file, values))
+            # Keep a few recent cubes: workers whose stores have diverged may still map older ones
+            cubes = sorted(glob.glob(os.path.join(directory, f"{CUBE_PREFIX}*.npy")), key=os.path.getmtime)
+            for stale in cubes[:-CUBE_KEEP]:
+                try:
+                    os.remove(stale)
+                    os.remove(f"{stale}.lock")
+                except OSError:
+                    pass
+    finally:
+        lock.close()
+
+    values = np.load(path, mmap_mode="r")
+    expected = (len(store.batter_names), len(store.teams), len(store.venues))
+    if values.shape != expected:
+        raise ValueError(f"Prediction cube {path} has shape {values.shape}, expected {expected}")
+    return PredictionCube(values, artifact.version, fingerprint, path)
+
+
+class CubeRefresher:
+    """Keeps one current cube per process, rebuilding it in the background when it goes stale.
+
+    current() never blocks: while a rebuild runs it returns None and callers fall
+    back to the model. After a failed build the same model and store are not tried
+    again for `retry_backoff` seconds; a new model or store is tried right away.
+    """
+
+    def __init__(self, get_store, get_model, directory=CUBE_DIR, retry_backoff=RETRY_BACKOFF):
+        self.get_store = get_store
+        self.get_model = get_model
+        self.directory = directory
+        self.retry_backoff = retry_backoff
+        self.cube = None
+        self.last_error = None
+        self._failed = None  # (model version, fingerprint, monotonic time) of the last failed build
+        self._thread = None
+        self._lock = threading.Lock()
+
+    def refresh(self):
+        """Load or build the cube for the current model and store; returns it or None"""
+        store, artifact = self.get_store(), self.get_model()
+        if store is None or artifact is None:
+            return None
+        try:
+            self.cube = load_or_build_cube(store, artifact, self.directory)
+            self.last_error = None
+            self._failed = None
+        except Exception as e:
+            self.last_error = str(e)
+            self._failed = (artifact.version, store.fingerprint, time.monotonic())
+            print(f"Error building prediction cube: {e}; retrying in {self.retry_backoff:g}s")
+        return self.cube
+
+    def current(self, artifact, fingerprint):
+        cube = self.cube
+        if cube is not None and cube.matches(artifact.version, fingerprint):
+            return cube
+        failed = self._failed
+        if failed is not None and failed[:2] == (artifact.version, fingerprint) \
+                and time.monotonic() - failed[2] < self.retry_backoff:
+            return None
+        with self._lock:
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(target=self.refresh, name="prediction-cube", daemon=True)
+                self._thread.start()
+        return None
@@ -0,0 +1,191 @@
+# profiling.py
+"""Opt-in profiling of single requests, persisted to a rotating directory.
+
+A profiled request runs under cProfile, while a sampling thread records the
+request thread's stack every `interval` seconds. Each profile is written as
+three files sharing one name:
+
+* <name>.prof       cProfile stats (python -m pstats, snakeviz)
+* <name>.collapsed  sampled stacks, one "frame;frame;frame count" line each
+                    (flamegraph.pl, speedscope)
+* <name>.json       what was profiled: path, status, duration, stage timings
+
+Only the newest `keep` profiles are kept.
+"""
+import cProfile
+import glob
+import hmac
+import itertools
+import json
+import os
+import random
+import sys
+import threading
+import time
+from collections import Counter
+
+
+def frame_label(frame):
+    code = frame.f_code
+    return f"{os.path.basename(code.co_filename)}:{code.co_name}"
+
+
+class StackSampler(threading.Thread):
+    """Counts the collapsed stacks of one thread, sampled every `interval` seconds"""
+
+    def __init__(self, thread_id, interval):
+        super().__init__(name="profile-sampler", daemon=True)
+        self.thread_id = thread_id
+        self.interval = interval
+        self.stacks = Counter()
+        self._done = threading.Event()
+
+    def run(self):
+        while not self._done.wait(self.interval):
+            frame = sys._current_frames().get(self.thread_id)
+            # The request may have finished while we waited for the GIL; don't sample stop() itself
+            if self._done.is_set():
+                break
+            stack = []
+            while frame is not None:
+                stack.append(frame_label(frame))
+                frame = frame.f_back
+            if stack:
+                self.stacks[";".join(reversed(stack))] += 1
+
+    def stop(self):
+        self._done.set()
+        self.join()
+
+
+class RequestProfile:
+    """One request being profiled; stage timings are added as the request runs"""
+
+    def __init__(self, trigger, interval):
+        self.trigger = trigger
+        self.stages = {}
+        self.started = time.perf_counter()
+        self.created_at = time.time()
+        self.profiler = cProfile.Profile()
+        # Raises ValueError where the interpreter allows one profiler at a time (3.12+)
+        self.profiler.enable()
+        self.sampler = StackSampler(threading.get_ident(), interval)
+        self.sampler.start()
+
+    def stop(self):
+        self.profiler.disable()
+        self.sampler.stop()
+        return time.perf_counter() - self.started
+
+
+class RequestProfiler:
+    """Decides which requests to profile and writes their profiles to `directory`.
+
+    A request is profiled when it carries the secret `token` or, failing that, with
+    probability `sample_rate`. The GIL only changes hands every switch interval, so
+    while any profile runs the interval is lowered to the sampling interval so the
+    sampler gets to run.
+    """
+
+    def __init__(self, directory, token=None, sample_rate=0.0, keep=50, interval=0.001):
+        self.directory = directory
+        self.token = token
+        self.sample_rate = sample_rate
+        self.keep = max(keep, 1)
+        self.interval = interval
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self._running = 0
+        self._switch_interval = None
+        self._sequence = itertools.count()
+
+    def trigger(self, header_token):
+        """Why this request should be profiled ("token" or "sample"), or None"""
+        # Compared as bytes: compare_digest raises TypeError on non-ASCII str
+        if self.token and header_token and hmac.compare_digest(header_token.encode("utf-8"), self.token.encode("utf-8")):
+            return "token"
+        if self.sample_rate > 0 and random.random() < self.sample_rate:
+            return "sample"
+        return None
+
+    def start(self, trigger):
+        """Start profiling the calling thread; None if another profile prevents it"""
+        with self._lock:
+            if self._running == 0:
+                self._switch_interval = sys.getswitchinterval()
+                sys.setswitchinterval(min(self._switch_interval, self.interval))
+            self._running += 1
+        try:
+            profile = RequestProfile(trigger, self.interval)
+        except ValueError:
+            self._release()
+            return None
+        self._local.profile = profile
+        return profile
+
+    def _release(self):
+        with self._lock:
+            self._running -= 1
+            if self._running == 0:
+                sys.setswitchinterval(self._switch_interval)
+
+    def observe(self, name, seconds, labels=None):
+        """Metrics observer: records the stage timings of the profile running on this thread"""
+        profile = getattr(self._local, "profile", None)
+        if profile is not None and labels and "stage" in labels:
+            stage = labels["stage"]
+            profile.stages[stage] = profile.stages.get(stage, 0.0) + seconds * 1000.0
+
+    def finish(self, profile, details):
+        """Stop the profile and write it; returns its summary"""
+        duration = profile.stop()
+        self._local.profile = None
+        self._release()
+
+        name = f"{time.strftime('%Y%m%dT%H%M%S', time.gmtime(profile.created_at))}" \
+               f"-{int(profile.created_at * 1000) % 1000:03d}-{os.getpid()}-{next(self._sequence)}"
+        summary = dict(
+            details,
+            name=name,
+            trigger=profile.trigger,
+            created_at=profile.created_at,
+            duration_ms=round(duration * 1000.0, 3),
+            stages_ms={stage: round(value, 3) for stage, value in profile.stages.items()},
+            samples=sum(profile.sampler.stacks.values()),
+            sample_interval_ms=self.interval * 1000.0,
+            pid=os.getpid()
+        )
+        os.makedirs(self.directory, exist_ok=True)
+        base = os.path.join(self.directory, name)
+        profile.profiler.dump_stats(f"{base}.prof")
+        with open(f"{base}.collapsed", "w") as file:
+            for stack, count in profile.sampler.stacks.most_common():
+                file.write(f"{stack} {count}\n")
+        # The summary goes last: listings only show profiles whose files are complete
+        with open(f"{base}.json.tmp", "w") as file:
+            json.dump(summary, file)
+        os.replace(f"{base}.json.tmp", f"{base}.json")
+        self.prune()
+        return summary
+
+    def prune(self):
+        summaries = sorted(glob.glob(os.path.join(self.directory, "*.json")))
+        for stale in summaries[:-self.keep]:
+            base = stale[:-len(".json")]
+            for path in (stale, f"{base}.prof", f"{base}.collapsed"):
+                try:
+                    os.remove(path)
+                except OSError:
+                    pass
+
+    def recent(self, limit=20):
+        """Summaries of the newest profiles, newest first"""
+        results = []
+        for path in sorted(glob.glob(os.path.join(self.directory, "*.json")), reverse=True)[:limit]:
+            try:
+                with open(path) as file:
+                    results.append(json.load(file))
+            except (OSError, ValueError):
+                # Pruned by another worker since the listing
+                continue
+        return results
@@ -0,0 +1,140 @@
+# score_fixtures.py
+"""Score a fixture list offline, in parallel, without going through the web server.
+
+The fixtures CSV needs opponent_team and venue_name columns. If it also has a
+batter_name column each row is one matchup; otherwise every fixture is scored for
+every batter in the feature store (or the ones passed with --batters).
+
+    python score_fixtures.py fixtures.csv -o predictions.csv --workers 8
+"""
+import argparse
+import csv
+import itertools
+import multiprocessing
+import os
+import sys
+import time
+from feature_store import load_csv_stats
+from model_registry import ModelRegistry
+from scoring import BATTER_STATS_CSV, build_feature_store, score_matchups
+
+OUTPUT_COLUMNS = ["batter_name", "opponent_team", "venue_name", "predicted_runs", "model_version", "error"]
+
+# Set in each worker by init_worker()
+worker_store = None
+worker_model = None
+
+
+def load_store():
+    return build_feature_store(load_csv_stats(BATTER_STATS_CSV))
+
+
+def init_worker(model_path):
+    """Build the feature store and load the model once per worker process (without the web app)"""
+    global worker_store, worker_model
+    model_path = model_path or os.environ.get("MODEL_PATH", "trained_model.pkl")
+    worker_store = load_store()
+    worker_model = ModelRegistry(model_path).load(model_path)
+    if worker_model is None:
+        raise RuntimeError(f"Model could not be loaded from {model_path}")
+
+
+def score_chunk(matchups):
+    """Score one chunk with the same validation and feature construction as /predict"""
+    results = score_matchups(worker_store, matchups, worker_model)
+    rows = []
+    for matchup, result in zip(matchups, results):
+        rows.append([
+            matchup["batter_name"],
+            matchup["opponent_team"],
+            matchup["venue_name"],
+            result.get("predicted_runs", ""),
+            worker_model.version,
+            result.get("error", "")
+        ])
+    return rows
+
+
+def read_fixtures(path, batters):
+    """Yield matchup dicts from the fixtures CSV, expanding batter-less rows over `batters`"""
+    with open(path, "r", newline="") as file:
+        reader = csv.DictReader(file)
+        if "opponent_team" not in reader.fieldnames or "venue_name" not in reader.fieldnames:
+            raise ValueError("Fixtures CSV needs opponent_team and venue_name columns")
+        has_batter = "batter_name" in reader.fieldnames
+        for row in reader:
+            opponent_team = row["opponent_team"].strip()
+            venue_name = row["venue_name"].strip()
+            names = [row["batter_name"].strip()] if has_batter else batters()
+            for batter_name in names:
+                yield {"batter_name": batter_name, "opponent_team": opponent_team, "venue_name": venue_name}
+
+
+def chunked(iterable, size):
+    iterator = iter(iterable)
+    while True:
+        chunk = list(itertools.islice(iterator, size))
+        if not chunk:
+            return
+        yield chunk
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Score a fixture list offline across a process pool")
+    parser.add_argument("fixtures", help="CSV with opponent_team, venue_name and optionally batter_name columns")
+    parser.add_argument("-o", "--output", default="predictions.csv", help="output path (.csv or .parquet)")
+    parser.add_argument("--model", help="model artifact to use instead of MODEL_PATH / trained_model.pkl")
+    parser.add_argument("--batters", nargs="*", help="batters to expand batter-less fixtures over (default: all)")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1)
+    parser.add_argument("--chunk-size", type=int, default=5000)
+    args = parser.parse_args(argv)
+
+    all_batters = []
+
+    def batters():
+        # Only build the store in the parent when fixtures actually need the roster
+        if not all_batters:
+            all_batters.extend(args.batters or load_store().batter_names)
+        return all_batters
+
+    parquet = args.output.endswith(".parquet")
+    started = time.perf_counter()
+    scored = 0
+    failed = 0
+    parquet_rows = []
+
+    chunks = chunked(read_fixtures(args.fixtures, batters), args.chunk_size)
+    with multiprocessing.Pool(args.workers, initializer=init_worker, initargs=(args.model,)) as pool:
+        output = None if parquet else open(args.output, "w", newline="")
+        try:
+            writer = csv.writer(output) if output else None
+            if writer:
+                writer.writerow(OUTPUT_COLUMNS)
+            for rows in pool.imap(score_chunk, chunks):
+                scored += len(rows)
+                failed += sum(1 for row in rows if row[5])
+                if writer:
+                    writer.writerows(rows)
+                else:
+                    parquet_rows.extend(rows)
+        finally:
+            if output:
+                output.close()
+
+    if parquet:
+        import pandas as pd
+
+        # Needs pyarrow or fastparquet installed
+        pd.DataFrame(parquet_rows, columns=OUTPUT_COLUMNS).to_parquet(args.output, index=False)
+
+    elapsed = time.perf_counter() - started
+    print(
+        f"Scored {scored} matchups ({failed} errors) with {args.workers} workers in {elapsed:.2f}s "
+        f"({scored / elapsed if elapsed else 0:.0f} matchups/s) -> {args.output}",
+        file=sys.stderr
+    )
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
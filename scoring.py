@@ -0,0 +1,146 @@
+# scoring.py
+"""Matchup validation and batch scoring, shared by the API and offline tools.
+
+Nothing here imports Flask: the feature store and model artifact are passed in, and
+callers that count rejected matchups pass on_error, which is called with the failure
+type ("missing_batter", "invalid_type", "unknown_batter", ...) of each one.
+"""
+import os
+import numpy as np
+from feature_store import FeatureStore
+from identity import BATTER_ALIASES
+from inference import predict_with_intervals
+from ipl_data import batter_profiles, ipl_venues, team_registry, venue_registry
+from team_strengths import TeamStrengths
+
+# Per-batter stats for the full roster
+BATTER_STATS_CSV = os.path.join(os.path.dirname(os.path.abspath(__file__)), "unified_batter_stats.csv")
+
+
+def build_feature_store(csv_stats, strengths=None):
+    """The app's feature store: the hand-coded profiles plus the CSV roster"""
+    if strengths is None:
+        strengths = TeamStrengths.from_profiles(team_registry, batter_profiles)
+    return FeatureStore.from_profiles(
+        batter_profiles, team_registry, venue_registry, ipl_venues, strengths.bowling,
+        csv_stats=csv_stats, batter_aliases=BATTER_ALIASES
+    )
+
+
+def _count(on_error, kind):
+    if on_error is not None:
+        on_error(kind)
+
+
+def matchup_type_error(batter_name, opponent_team, venue_name, on_error=None):
+    """Error message if a matchup field isn't a string (the lookups can't take lists or objects), else None"""
+    for field, value in (("batter_name", batter_name), ("opponent_team", opponent_team), ("venue_name", venue_name)):
+        if not isinstance(value, str):
+            _count(on_error, "invalid_type")
+            return f"{field} must be a string"
+    return None
+
+
+def resolve_matchup(store, batter_name, opponent_team, venue_name, on_error=None):
+    """Map a matchup to feature store indices; returns (indices, None) or (None, error message)"""
+    if not batter_name:
+        _count(on_error, "missing_batter")
+        return None, "Batter name is required"
+    error = matchup_type_error(batter_name, opponent_team, venue_name, on_error)
+    if error:
+        return None, error
+    batter = store.batter_index.get(batter_name)
+    if batter is None:
+        _count(on_error, "unknown_batter")
+        return None, f"Batter {batter_name} not found in database"
+    venue = store.venue_index.get(venue_name)
+    if venue is None:
+        _count(on_error, "unknown_venue")
+        return None, f"Venue {venue_name} not found in database"
+    team = store.team_index.get(opponent_team)
+    if team is None:
+        _count(on_error, "unknown_team")
+        return None, f"Team {opponent_team} not found in database"
+    return (batter, team, venue), None
+
+
+def format_prediction(batter_name, opponent_team, venue_name, prediction, features, model_version):
+    """Build the response body for a single scored matchup"""
+    return {
+        "batter": batter_name,
+        "opponent_team": opponent_team,
+        "venue": venue_name,
+        "predicted_runs": float(prediction),
+        "model_version": model_version,
+        "features_used": {
+            "average_runs": float(features[0]),
+            "average_strike_rate": float(features[1]),
+            "total_balls_faced": int(features[2]),
+            "total_dismissals": int(features[3]),
+            "opponent_strength": float(features[4]),
+            "venue_difficulty": float(features[5]),
+            "batter_opponent_interaction": float(features[6]),
+            "batter_venue_interaction": float(features[7]),
+            "average_runs_vs_team": float(features[8]),
+            "average_runs_vs_venue": float(features[9])
+        }
+    }
+
+
+def format_interval(std, quantile_values, quantiles, method):
+    return {
+        "method": method,
+        "std": float(std),
+        "quantiles": {str(q): float(value) for q, value in zip(quantiles, quantile_values)}
+    }
+
+
+def score_matchups(store, matchups, active_model, start_index=0, quantiles=None, cube=None, on_error=None):
+    """Validate and score a list of matchup dicts with a single model.predict call.
+
+    Returns one result per matchup, in order; unknown batters, teams or venues get an
+    error entry instead of failing the whole list. Indices are numbered from start_index.
+    With `quantiles`, each result also carries a prediction interval; otherwise a
+    prediction `cube` for this model and store, if given, replaces the model call.
+    """
+    results = [None] * len(matchups)
+    valid = []
+    valid_indices = []
+
+    # Validate every item up front so one bad matchup doesn't fail the batch
+    for i, item in enumerate(matchups):
+        if not isinstance(item, dict):
+            results[i] = {"index": start_index + i, "error": "Matchup must be an object"}
+            continue
+        batter_name = item.get("batter_name", "")
+        opponent_team = item.get("opponent_team", "")
+        venue_name = item.get("venue_name", "")
+        indices, error = resolve_matchup(store, batter_name, opponent_team, venue_name, on_error)
+        if error:
+            results[i] = {"index": start_index + i, "error": error}
+        else:
+            valid.append((i, batter_name))
+            valid_indices.append(indices)
+
+    if valid:
+        # Gather every row with one fancy index and score them in a single call
+        batters, teams, venues = np.array(valid_indices, dtype=np.intp).T
+        features = store.rows(batters, teams, venues)
+        if quantiles:
+            predictions, std, quantile_values, method = predict_with_intervals(active_model, features, quantiles)
+        elif cube is not None:
+            predictions = cube.values[batters, teams, venues]
+        else:
+            predictions = active_model.predict(features)
+
+        for row, (i, batter_name) in enumerate(valid):
+            result = format_prediction(
+                batter_name, store.teams[teams[row]], store.venues[venues[row]],
+                predictions[row], features[row], active_model.version
+            )
+            if quantiles:
+                result["prediction_interval"] = format_interval(std[row], quantile_values[:, row], quantiles, method)
+            result["index"] = start_index + i
+            results[i] = result
+
+    return results
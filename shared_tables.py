@@ -0,0 +1,112 @@
+# shared_tables.py
+import ctypes
+import ctypes.util
+import gc
+import glob
+import json
+import os
+import struct
+import numpy as np
+from feature_store import CACHE_DIR, write_atomic
+
+# Where segments are written: tmpfs when available, so they never touch the disk
+SEGMENT_DIR = os.environ.get("SHARED_TABLES_DIR", "/dev/shm" if os.path.isdir("/dev/shm") else CACHE_DIR)
+SEGMENT_PREFIX = "ipl-tables-"
+
+# Array data is aligned so every view starts on a cache line
+ALIGNMENT = 64
+
+try:
+    libc = ctypes.CDLL(ctypes.util.find_library("c"))
+except OSError:
+    libc = None
+
+
+def _aligned(offset):
+    return (offset + ALIGNMENT - 1) // ALIGNMENT * ALIGNMENT
+
+
+def segment_path(key, directory=SEGMENT_DIR):
+    return os.path.join(directory, f"{SEGMENT_PREFIX}{key}.bin")
+
+
+def write_segment(path, arrays):
+    """Write {name: array} into one file: an 8-byte header length, a JSON header, then the aligned data"""
+    arrays = {name: np.ascontiguousarray(array) for name, array in arrays.items()}
+    header, offset = {}, 0
+    for name, array in arrays.items():
+        offset = _aligned(offset)
+        header[name] = {"dtype": array.dtype.str, "shape": list(array.shape), "offset": offset}
+        offset += array.nbytes
+    header_bytes = json.dumps(header).encode("utf-8")
+    data_start = _aligned(8 + len(header_bytes))
+
+    def write(file):
+        file.write(struct.pack("<Q", len(header_bytes)))
+        file.write(header_bytes)
+        for name, array in arrays.items():
+            file.seek(data_start + header[name]["offset"])
+            file.write(array.tobytes())
+
+    write_atomic(path, write)
+
+
+def attach_segment(path):
+    """Map a segment read-only; returns {name: array view}"""
+    buffer = np.memmap(path, dtype=np.uint8, mode="r")
+    header_length = struct.unpack("<Q", buffer[:8].tobytes())[0]
+    header = json.loads(buffer[8:8 + header_length].tobytes())
+    data_start = _aligned(8 + header_length)
+    return {
+        name: np.ndarray(tuple(entry["shape"]), dtype=np.dtype(entry["dtype"]), buffer=buffer,
+                         offset=data_start + entry["offset"])
+        for name, entry in header.items()
+    }
+
+
+def share_arrays(key, arrays, directory=SEGMENT_DIR):
+    """Publish arrays under key (once per host) and return read-only views of the shared copy.
+
+    Segments are content-addressed, so every worker computing the same key attaches
+    to the same pages. Older segments are unlinked; processes still mapping them
+    keep working until they attach to the new one.
+    """
+    path = segment_path(key, directory)
+    if not os.path.exists(path):
+        os.makedirs(directory, exist_ok=True)
+        write_segment(path, arrays)
+        for stale in glob.glob(os.path.join(directory, f"{SEGMENT_PREFIX}*.bin")):
+            if stale != path:
+                try:
+                    os.remove(stale)
+                except OSError:
+                    pass
+    return attach_segment(path)
+
+
+def memory_usage():
+    """Resident memory of this process in bytes from /proc/self/status (empty where unavailable)"""
+    fields = {"VmRSS": "rss", "RssAnon": "anonymous", "RssFile": "file", "RssShmem": "shared_memory"}
+    usage = {}
+    try:
+        with open("/proc/self/status") as status:
+            for line in status:
+                name, _, value = line.partition(":")
+                if name in fields:
+                    usage[fields[name]] = int(value.split()[0]) * 1024
+    except OSError:
+        pass
+    return usage
+
+
+def trim_heap():
+    """Hand the heap pages freed so far back to the OS; False where malloc_trim (glibc) is missing.
+
+    glibc keeps freed memory for reuse, so dropping a large object such as an sklearn
+    forest doesn't lower RSS, and forked workers would still map the pages, until trimmed.
+    """
+    gc.collect()
+    if libc is None or not hasattr(libc, "malloc_trim"):
+        return False
+    libc.malloc_trim(0)
+    return True
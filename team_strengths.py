@@ -0,0 +1,90 @@
+# team_strengths.py
+from fractions import Fraction
+from identity import IdentityRegistry
+
+# Used when no batter in the profiles has data for a team
+DEFAULT_BOWLING_STRENGTH = 8.5
+DEFAULT_BATTING_STRENGTH = 35.0
+
+
+def bowling_strength_from_average(avg_batting_against):
+    # Lower batting average -> higher bowling strength, scaled to 7.5-9.5
+    bowling_strength = 16.5 - (avg_batting_against / 5)
+    return round(max(min(bowling_strength, 9.5), 7.5), 1)
+
+
+class TeamStrengths:
+    """Team bowling/batting strengths kept up to date from running sums and counts.
+
+    Bowling strength comes from every non-zero batting average recorded against a
+    team; batting strength from the average_runs of the batters who play for it
+    (0.0 against their own team). Sums are exact Fractions so the result matches
+    statistics.mean() over the full roster, while adding, replacing or removing one
+    profile only touches the teams that profile mentions.
+
+    Internally teams are the dense ids of an IdentityRegistry; `bowling` and
+    `batting` are kept as {team code: strength} views for the API.
+    """
+
+    def __init__(self, teams):
+        self.team_ids = teams if isinstance(teams, IdentityRegistry) else IdentityRegistry(teams)
+        self.teams = self.team_ids.names
+        count = len(self.teams)
+        self.bowling_sums = [Fraction(0)] * count
+        self.bowling_counts = [0] * count
+        self.batting_sums = [Fraction(0)] * count
+        self.batting_counts = [0] * count
+        self.bowling = {team: DEFAULT_BOWLING_STRENGTH for team in self.teams}
+        self.batting = {team: DEFAULT_BATTING_STRENGTH for team in self.teams}
+
+    @classmethod
+    def from_profiles(cls, teams, batter_profiles):
+        strengths = cls(teams)
+        for profile in batter_profiles.values():
+            strengths._apply(profile, 1)
+        strengths._refresh(range(len(strengths.teams)))
+        return strengths
+
+    def update(self, old_profile, new_profile):
+        """Swap one batter's contribution; either profile may be None. Returns the ids of the teams that changed"""
+        touched = set()
+        if old_profile is not None:
+            touched |= self._apply(old_profile, -1)
+        if new_profile is not None:
+            touched |= self._apply(new_profile, 1)
+        return self._refresh(touched)
+
+    def _apply(self, profile, sign):
+        touched = set()
+        for name, avg in profile["team_averages"].items():
+            team = self.team_ids.get(name)
+            if team is None:
+                continue
+            if avg > 0:
+                self.bowling_sums[team] += sign * Fraction(avg)
+                self.bowling_counts[team] += sign
+                touched.add(team)
+            elif avg == 0.0:
+                self.batting_sums[team] += sign * Fraction(profile["average_runs"])
+                self.batting_counts[team] += sign
+                touched.add(team)
+        return touched
+
+    def _refresh(self, teams):
+        changed = []
+        for team in sorted(teams):
+            if self.bowling_counts[team]:
+                bowling = bowling_strength_from_average(float(self.bowling_sums[team] / self.bowling_counts[team]))
+            else:
+                bowling = DEFAULT_BOWLING_STRENGTH
+            if self.batting_counts[team]:
+                batting = float(self.batting_sums[team] / self.batting_counts[team])
+            else:
+                batting = DEFAULT_BATTING_STRENGTH
+
+            name = self.teams[team]
+            if bowling != self.bowling[name] or batting != self.batting[name]:
+                changed.append(team)
+            self.bowling[name] = bowling
+            self.batting[name] = batting
+        return changed
@@ -0,0 +1,142 @@
+# test_aggregate_stats.py
+import csv
+import json
+import os
+import pytest
+import aggregate_stats
+import feature_store
+
+# Three matches of deliveries; with a chunk size of 2 the first innings spans three chunks
+# and V Kohli is missing from the middle one
+DELIVERIES = """match_id,inning,batter,bowling_team,venue,batsman_runs,extras_type
+1,1,V Kohli,Mumbai Indians,Wankhede Stadium,4,
+1,1,F du Plessis,Mumbai Indians,Wankhede Stadium,1,
+1,1,F du Plessis,Mumbai Indians,Wankhede Stadium,0,wides
+1,1,F du Plessis,Mumbai Indians,Wankhede Stadium,6,
+1,1,F du Plessis,Mumbai Indians,Wankhede Stadium,1,
+1,1,V Kohli,Mumbai Indians,Wankhede Stadium,2,
+2,2,V Kohli,Chennai Super Kings,M Chinnaswamy Stadium,0,
+2,2,V Kohli,Chennai Super Kings,M Chinnaswamy Stadium,4,
+2,2,V Kohli,Chennai Super Kings,M Chinnaswamy Stadium,0,wides
+3,1,V Kohli,Mumbai Indians,M Chinnaswamy Stadium,6,
+3,1,V Kohli,Mumbai Indians,M Chinnaswamy Stadium,4,
+"""
+
+# The same innings, one row each
+INNINGS_HEADER = "batter,bowling_team,venue,runs,balls\n"
+INNINGS = [
+    "V Kohli,Mumbai Indians,Wankhede Stadium,6,2\n",
+    "F du Plessis,Mumbai Indians,Wankhede Stadium,8,3\n",
+    "V Kohli,Chennai Super Kings,M Chinnaswamy Stadium,4,2\n",
+    "V Kohli,Mumbai Indians,M Chinnaswamy Stadium,10,2\n"
+]
+
+
+@pytest.fixture(autouse=True)
+def csv_cache(tmp_path, monkeypatch):
+    # Keep the binary CSV caches out of the repo's cache directory
+    cache_dir = str(tmp_path / "cache")
+    monkeypatch.setattr(aggregate_stats, "load_csv_stats", lambda path: feature_store.load_csv_stats(path, cache_dir))
+
+
+def write_file(path, text):
+    path.write_text(text)
+    return str(path)
+
+
+def run(directory, inputs, *options):
+    """Run the aggregator with its state and CSVs in directory; returns the exit code"""
+    directory.mkdir(exist_ok=True)
+    return aggregate_stats.main([
+        *inputs, "--state", str(directory / "state.json"),
+        "--unified", str(directory / "unified.csv"), "--engineered", str(directory / "engineered.csv"),
+        *options
+    ])
+
+
+def read_layout(path):
+    with open(path, newline="") as file:
+        return {row["batter"]: {column: float(value) for column, value in row.items() if column != "batter"}
+                for row in csv.DictReader(file)}
+
+
+def read_layouts(directory):
+    return read_layout(directory / "unified.csv"), read_layout(directory / "engineered.csv")
+
+
+def test_layouts_and_chunk_sizes_give_the_same_aggregates(tmp_path):
+    deliveries = write_file(tmp_path / "deliveries.csv", DELIVERIES)
+    innings = write_file(tmp_path / "innings.csv", INNINGS_HEADER + "".join(INNINGS))
+    assert run(tmp_path / "innings", [innings]) == 0
+    assert run(tmp_path / "whole", [deliveries]) == 0
+    assert run(tmp_path / "chunked", [deliveries], "--chunk-size", "2") == 0
+
+    expected = read_layouts(tmp_path / "innings")
+    assert read_layouts(tmp_path / "whole") == expected
+    assert read_layouts(tmp_path / "chunked") == expected
+
+    unified, engineered = expected
+    kohli = unified["V Kohli"]
+    assert kohli["avg_total_runs"] == pytest.approx(20 / 3)
+    assert kohli["avg_strike_rate"] == pytest.approx(20 / 6 * 100)
+    assert kohli["Mumbai Indians"] == 8.0
+    assert kohli["avg_runs_vs_team"] == 6.0
+    assert kohli["avg_runs_at_stadium"] == 6.5
+    assert engineered["V Kohli"]["avg_runs_vs_Chennai Super Kings"] == 4.0
+    assert unified["F du Plessis"]["avg_strike_rate"] == pytest.approx(8 / 3 * 100)
+
+
+def test_later_runs_add_to_the_totals_and_team_columns(tmp_path):
+    first = write_file(tmp_path / "first.csv", INNINGS_HEADER + "".join(INNINGS[:2]))
+    second = write_file(tmp_path / "second.csv", INNINGS_HEADER + "".join(INNINGS[2:]))
+    assert run(tmp_path / "all", [first, second]) == 0
+    assert run(tmp_path / "runs", [first]) == 0
+    assert "Chennai Super Kings" not in read_layouts(tmp_path / "runs")[0]["V Kohli"]
+    assert run(tmp_path / "runs", [second]) == 0
+    # Already ingested, so nothing changes
+    assert run(tmp_path / "runs", [first, second]) == 0
+
+    assert read_layouts(tmp_path / "runs") == read_layouts(tmp_path / "all")
+    assert read_layouts(tmp_path / "runs")[0]["F du Plessis"]["Chennai Super Kings"] == 0.0
+
+
+def test_refuses_to_overwrite_untracked_batters(tmp_path):
+    directory = tmp_path / "run"
+    directory.mkdir()
+    existing = "batter,avg_total_runs,avg_strike_rate,avg_runs_vs_team,avg_runs_at_stadium,Mumbai Indians\n" \
+        "V Kohli,40.0,130.0,38.0,41.0,38.0\n"
+    write_file(directory / "unified.csv", existing)
+    innings = write_file(tmp_path / "innings.csv", INNINGS_HEADER + INNINGS[0])
+
+    assert run(directory, [innings]) == 1
+    assert (directory / "unified.csv").read_text() == existing
+    assert not (directory / "engineered.csv").exists()
+    assert not (directory / "state.json").exists()
+
+    assert run(directory, [innings], "--replace-untracked") == 0
+    assert read_layout(directory / "unified.csv")["V Kohli"]["avg_total_runs"] == 6.0
+
+
+def test_failed_run_can_be_repeated(tmp_path, monkeypatch):
+    innings = write_file(tmp_path / "innings.csv", INNINGS_HEADER + "".join(INNINGS))
+    directory = tmp_path / "run"
+    write_layout = aggregate_stats.write_layout
+
+    def fail_on_engineered(path, layout, state, touched):
+        if layout == "engineered":
+            raise OSError("disk full")
+        return write_layout(path, layout, state, touched)
+
+    monkeypatch.setattr(aggregate_stats, "write_layout", fail_on_engineered)
+    with pytest.raises(OSError):
+        run(directory, [innings])
+    # The unified CSV already has the new rows but the inputs aren't marked ingested
+    assert not (directory / "state.json").exists()
+    with open(directory / "state.json.pending") as file:
+        assert json.load(file) == ["F du Plessis", "V Kohli"]
+
+    monkeypatch.setattr(aggregate_stats, "write_layout", write_layout)
+    assert run(directory, [innings]) == 0
+    assert not os.path.exists(directory / "state.json.pending")
+    assert run(tmp_path / "clean", [innings]) == 0
+    assert read_layouts(directory) == read_layouts(tmp_path / "clean")
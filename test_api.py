@@ -4,9 +4,11 @@ import json
 # API URL
 url = "https://ml-t4wt.onrender.com/predict"
 
-# Sample input features
+# Sample matchup in the shape /predict expects (see bench.py for local load tests)
 data = {
-    "features": [1,30,45]  # Replace with actual feature values if needed
+    "batter_name": "Virat Kohli",
+    "opponent_team": "MI",
+    "venue_name": "Wankhede Stadium"
 }
 
 # Convert to JSON format
@@ -0,0 +1,88 @@
+# test_app.py
+import json
+import time
+import pytest
+from sklearn.linear_model import LinearRegression
+import app
+from model_registry import save_model_artifact
+
+VALID = {"batter_name": "Virat Kohli", "opponent_team": "MI", "venue_name": "Wankhede Stadium"}
+
+
+@pytest.fixture(scope="module")
+def client(tmp_path_factory):
+    app.warm_up()
+    features = app.compile_sample_features(500)
+    path = str(tmp_path_factory.mktemp("model") / "model.pkl")
+    save_model_artifact(LinearRegression().fit(features, features[:, 0]), path)
+    previous = app.model_registry.current()
+    assert app.model_registry.load(path) is not None
+    yield app.app.test_client()
+    app.model_registry._active = previous
+
+
+def test_batch_reports_non_string_fields_per_item(client):
+    matchups = [
+        VALID,
+        dict(VALID, batter_name=["Virat Kohli"]),
+        dict(VALID, opponent_team={"name": "MI"}),
+        dict(VALID, venue_name=7),
+        dict(VALID, batter_name="Rohit Sharma")
+    ]
+    response = client.post("/predict/batch", json={"matchups": matchups})
+    assert response.status_code == 200
+    body = response.get_json()
+    assert body["errors"] == 3
+    results = body["results"]
+    assert [result["index"] for result in results] == [0, 1, 2, 3, 4]
+    assert [("error" in result) for result in results] == [False, True, True, True, False]
+    assert results[1]["error"] == "batter_name must be a string"
+    assert results[2]["error"] == "opponent_team must be a string"
+    assert results[3]["error"] == "venue_name must be a string"
+    assert results[4]["batter"] == "Rohit Sharma"
+
+
+def test_predict_rejects_non_string_fields(client):
+    response = client.post("/predict", json=dict(VALID, batter_name=["Virat Kohli"]))
+    assert response.status_code == 400
+    assert response.get_json()["error"] == "batter_name must be a string"
+
+
+def stream_lines(client, items):
+    body = "\n".join(json.dumps(item) for item in items)
+    response = client.post("/predict/stream", data=body, headers={"Accept": "application/x-ndjson"})
+    assert response.status_code == 200
+    return [json.loads(line) for line in response.data.splitlines()]
+
+
+def test_stream_keeps_valid_lines_around_a_bad_one(client):
+    lines = stream_lines(client, [VALID, {"batter_name": {"x": 1}}, VALID, VALID, VALID])
+    assert [line["index"] for line in lines] == [0, 1, 2, 3, 4]
+    assert [("error" in line) for line in lines] == [False, True, False, False, False]
+
+
+def test_stream_continues_after_a_failed_chunk(client, monkeypatch):
+    score_matchups = app.score_matchups
+    calls = []
+
+    def failing_once(matchups, *args, **kwargs):
+        calls.append(len(matchups))
+        if len(calls) == 1:
+            raise RuntimeError("boom")
+        return score_matchups(matchups, *args, **kwargs)
+
+    monkeypatch.setattr(app, "STREAM_CHUNK_SIZE", 2)
+    monkeypatch.setattr(app, "score_matchups", failing_once)
+    lines = stream_lines(client, [VALID] * 5)
+    assert [line["index"] for line in lines] == [0, 1, 2, 3, 4]
+    assert [("error" in line) for line in lines] == [True, True, False, False, False]
+
+
+@pytest.mark.parametrize("start", ["t={:.6f}", "{:.0f}000"])
+def test_deadline_counts_time_queued_before_the_app(client, start):
+    headers = {"X-Request-Deadline-Ms": "500", "X-Request-Start": start.format(time.time() - 1)}
+    response = client.post("/predict", json=VALID, headers=headers)
+    assert response.status_code == 503
+    assert response.get_json()["error"] == "Request deadline exceeded"
+    headers["X-Request-Start"] = start.format(time.time())
+    assert client.post("/predict", json=VALID, headers=headers).status_code == 200
@@ -0,0 +1,94 @@
+# test_team_strengths.py
+import random
+from feature_store import FeatureStore, load_csv_stats
+from identity import BATTER_ALIASES
+from ipl_data import batter_profiles, ipl_teams, ipl_venues, team_registry, venue_registry
+from team_strengths import TeamStrengths
+
+
+def random_profile(rng):
+    # Averages against a random subset of teams, 0.0 (plays for) one of them
+    teams = rng.sample(ipl_teams, rng.randint(0, len(ipl_teams)))
+    team_averages = {team: round(rng.uniform(5, 60), 1) for team in teams}
+    if teams and rng.random() < 0.7:
+        team_averages[teams[0]] = 0.0
+    return {
+        "average_runs": round(rng.uniform(5, 50), 1),
+        "average_strike_rate": round(rng.uniform(90, 180), 1),
+        "total_balls_faced": rng.randint(0, 3000),
+        "total_dismissals": rng.randint(0, 80),
+        "team_averages": team_averages,
+        "venue_averages": {venue: round(rng.uniform(5, 60), 1) for venue in rng.sample(list(ipl_venues), 3)}
+    }
+
+
+def build_store(profiles, strengths):
+    return FeatureStore.from_profiles(
+        profiles, team_registry, venue_registry, ipl_venues, strengths.bowling,
+        csv_stats=load_csv_stats("unified_batter_stats.csv"), batter_aliases=BATTER_ALIASES
+    )
+
+
+def test_random_updates_match_full_recompute():
+    rng = random.Random(0)
+    profiles = {name: dict(profile) for name, profile in batter_profiles.items()}
+    strengths = TeamStrengths.from_profiles(team_registry, profiles)
+    for step in range(300):
+        name = rng.choice(list(profiles) + [f"New Batter {step}"])
+        old = profiles.get(name)
+        if old is not None and rng.random() < 0.2:
+            strengths.update(old, None)
+            del profiles[name]
+        else:
+            new = random_profile(rng)
+            strengths.update(old, new)
+            profiles[name] = new
+        expected = TeamStrengths.from_profiles(team_registry, profiles)
+        assert strengths.bowling == expected.bowling
+        assert strengths.batting == expected.batting
+
+
+def test_csv_batter_profile_carries_no_membership():
+    strengths = TeamStrengths.from_profiles(team_registry, batter_profiles)
+    store = build_store(batter_profiles, strengths)
+    before = (dict(strengths.bowling), dict(strengths.batting))
+    csv_names = store.batter_names[len(batter_profiles):]
+    for name in random.Random(1).sample(csv_names, 50):
+        profile = store.profile(name)
+        assert all(average > 0 for average in profile["team_averages"].values())
+        strengths.update(None, profile)
+        strengths.update(profile, None)
+    assert (strengths.bowling, strengths.batting) == before
+
+    # A batter who never faced anyone adds nothing at all
+    profiles = dict(batter_profiles, **{"Abdur Razzak": store.profile("Abdur Razzak")})
+    assert TeamStrengths.from_profiles(team_registry, profiles).batting == strengths.batting
+
+
+def test_app_upserts_match_full_recompute():
+    # The model isn't needed: warm_up() still builds the strengths and the feature store
+    import app
+
+    app.warm_up()
+    saved = {name: dict(profile) for name, profile in app.batter_profiles.items()}
+    rng = random.Random(2)
+    try:
+        names = list(app.feature_store.batter_names) + ["V Kohli", "DP Conway"]
+        for step in range(100):
+            name = rng.choice(names)
+            if rng.random() < 0.3:
+                updates = {}
+            elif rng.random() < 0.5:
+                updates = {"team_averages": random_profile(rng)["team_averages"]}
+            else:
+                updates = random_profile(rng)
+            app.upsert_batter_profile(name, updates)
+
+            expected = TeamStrengths.from_profiles(team_registry, app.batter_profiles)
+            assert app.team_bowling_strengths == expected.bowling
+            assert app.team_batting_strengths == expected.batting
+            assert app.feature_store.opponent_strength.tolist() == [expected.bowling[team] for team in ipl_teams]
+        assert "V Kohli" not in app.batter_profiles
+    finally:
+        app.batter_profiles.clear()
+        app.batter_profiles.update(saved)
@@ -0,0 +1,172 @@
+# train.py
+"""Train the runs model from engineered_batter_stats.csv and write a versioned artifact.
+
+Training rows are built with the same FeatureStore the API serves from: one row
+per batter and opponent the batter has an average against, played at the
+opponent's home ground. The target is that average, so the vs-team feature is
+replaced by the batter's mean against the *other* teams (leave-one-out) to keep
+the target out of the features.
+
+The assembled matrix is cached on disk (keyed on the CSV contents and feature
+layout), and the grid search and cross-validation run across a process pool.
+
+    python train.py -o trained_model.pkl --jobs -1
+"""
+import argparse
+import hashlib
+import json
+import os
+import platform
+import sys
+import time
+import numpy as np
+from feature_store import CACHE_DIR, FEATURE_NAMES, FeatureStore, file_sha256, load_csv_stats, write_atomic
+from inference import RESIDUAL_LEVELS
+from identity import BATTER_ALIASES
+from ipl_data import batter_profiles, ipl_venues, team_registry, venue_registry
+from model_registry import save_model_artifact
+from team_strengths import TeamStrengths
+
+ROOT = os.path.dirname(os.path.abspath(__file__))
+TRAINING_CSV = os.path.join(ROOT, "engineered_batter_stats.csv")
+
+# Bump whenever the way training rows are assembled changes
+TRAINING_FEATURES_VERSION = 2
+
+# Searched with cross-validation; every combination is fitted cv times
+PARAM_GRID = {
+    "n_estimators": [100, 200],
+    "max_depth": [6, 10, None],
+    "min_samples_leaf": [1, 5]
+}
+
+
+def build_training_set(csv_path):
+    """(X, y, groups, store) for every batter/opponent pair with a recorded average"""
+    strengths = TeamStrengths.from_profiles(team_registry, batter_profiles)
+    store = FeatureStore.from_profiles(
+        batter_profiles, team_registry, venue_registry, ipl_venues, strengths.bowling,
+        csv_stats=load_csv_stats(csv_path), batter_aliases=BATTER_ALIASES
+    )
+
+    averages = store.team_averages
+    played = store.team_played
+    counts = played.sum(axis=1)
+    sums = np.where(played, averages, 0.0).sum(axis=1)
+    # Leave-one-out needs at least one other opponent
+    batters, teams = np.nonzero(played & (counts[:, None] > 1))
+
+    # Venue ids follow team ids (ipl_venues lists each team's home ground in ipl_teams order)
+    X = store.rows(batters, teams, teams)
+    y = averages[batters, teams].copy()
+    X[:, FEATURE_NAMES.index("average_runs_vs_team")] = (sums[batters] - y) / (counts[batters] - 1)
+    return X, y, batters, store
+
+
+def load_training_set(csv_path, cache_dir=CACHE_DIR):
+    """build_training_set() through an on-disk cache; returns (X, y, groups, cache key, hit)"""
+    key = hashlib.sha1(
+        f"{TRAINING_FEATURES_VERSION}:{file_sha256(csv_path)}:{','.join(FEATURE_NAMES)}".encode("utf-8")
+    ).hexdigest()[:16]
+    path = os.path.join(cache_dir, f"training-{key}.npz")
+    if os.path.exists(path):
+        with np.load(path) as cached:
+            return cached["X"], cached["y"], cached["groups"], key, True
+
+    X, y, groups, _ = build_training_set(csv_path)
+    try:
+        os.makedirs(cache_dir, exist_ok=True)
+        write_atomic(path, lambda file: np.savez(file, X=X, y=y, groups=groups))
+    except OSError as e:
+        print(f"Warning: could not write training cache {path}: {e}", file=sys.stderr)
+    return X, y, groups, key, False
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Train the runs model and write a versioned artifact")
+    parser.add_argument("--data", default=TRAINING_CSV, help="engineered batter stats CSV")
+    parser.add_argument("-o", "--output", default="trained_model.pkl", help="artifact path (.pkl or .joblib)")
+    parser.add_argument("--report", help="timing report path (default: <output>.timings.json)")
+    parser.add_argument("--jobs", type=int, default=-1, help="worker processes for the search (-1: all cores)")
+    parser.add_argument("--folds", type=int, default=5)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args(argv)
+
+    from sklearn import __version__ as sklearn_version
+    from sklearn.ensemble import RandomForestRegressor
+    from sklearn.model_selection import GridSearchCV, GroupKFold, cross_val_predict
+
+    timings = {}
+    started = time.perf_counter()
+
+    stage = time.perf_counter()
+    X, y, groups, data_key, cache_hit = load_training_set(args.data)
+    timings["features"] = time.perf_counter() - stage
+    print(f"{len(y)} training rows from {len(np.unique(groups))} batters "
+          f"({'cached' if cache_hit else 'built'} in {timings['features']:.2f}s)", file=sys.stderr)
+
+    # Folds split by batter so no batter is on both sides of a split
+    cv = GroupKFold(n_splits=args.folds)
+    stage = time.perf_counter()
+    search = GridSearchCV(
+        RandomForestRegressor(random_state=args.seed, n_jobs=1),
+        PARAM_GRID,
+        scoring="neg_root_mean_squared_error",
+        cv=cv,
+        n_jobs=args.jobs,
+        refit=True
+    )
+    search.fit(X, y, groups=groups)
+    timings["search"] = time.perf_counter() - stage
+    print(f"Best {search.best_params_}: CV RMSE {-search.best_score_:.3f} ({timings['search']:.2f}s)", file=sys.stderr)
+
+    # Out-of-fold residuals give the intervals for models without per-tree spread
+    stage = time.perf_counter()
+    out_of_fold = cross_val_predict(search.best_estimator_, X, y, groups=groups, cv=cv, n_jobs=args.jobs)
+    residuals = y - out_of_fold
+    timings["residuals"] = time.perf_counter() - stage
+
+    stage = time.perf_counter()
+    # Same data, grid and seed -> same version
+    version = hashlib.sha1(
+        f"{data_key}:{json.dumps(search.best_params_, sort_keys=True)}:{args.seed}:{sklearn_version}".encode("utf-8")
+    ).hexdigest()[:12]
+    metadata = {
+        "version": version,
+        "trained_at": time.time(),
+        "feature_names": FEATURE_NAMES,
+        "training_data": {"path": os.path.basename(args.data), "sha256": file_sha256(args.data), "rows": len(y)},
+        "best_params": search.best_params_,
+        "cv_rmse": float(-search.best_score_),
+        "out_of_fold_rmse": float(np.sqrt(np.mean(residuals ** 2))),
+        "residual_quantiles": np.quantile(residuals, RESIDUAL_LEVELS).tolist(),
+        "residual_std": float(residuals.std()),
+        "seed": args.seed,
+        "sklearn_version": sklearn_version
+    }
+    save_model_artifact(search.best_estimator_, args.output, metadata)
+    timings["save"] = time.perf_counter() - stage
+    timings["total"] = time.perf_counter() - started
+
+    report = {
+        "version": version,
+        "output": args.output,
+        "rows": len(y),
+        "features_cached": cache_hit,
+        "candidates": len(search.cv_results_["params"]),
+        "folds": args.folds,
+        "jobs": args.jobs,
+        "cpu_count": os.cpu_count(),
+        "python": platform.python_version(),
+        "timings_s": {name: round(value, 3) for name, value in timings.items()}
+    }
+    report_path = args.report or f"{args.output}.timings.json"
+    with open(report_path, "w") as file:
+        json.dump(report, file, indent=2)
+
+    print(f"Model {version} -> {args.output} in {timings['total']:.2f}s (report: {report_path})", file=sys.stderr)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())